@@ -1,43 +1,151 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
 import pandas as pd
+import numpy as np
 from faker import Faker
+from faker import VERSION as FAKER_VERSION
 import random
 import uuid
+import string
 import datetime
 import os
 import zipfile
 import json
+import re
+import zlib
+import gzip
+import io
+import hashlib
+import sqlite3
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # Format parquet/arrow/csv_zstd dinonaktifkan tanpa pyarrow
+    pa = pq = None
 from dotenv import load_dotenv
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 import time
+import threading
+import queue
+import multiprocessing
+import shutil
+import importlib
+import copy
+import contextlib
+import mmap
+import concurrent.futures
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
 
-fake = Faker('id_ID')
+FAKER_LOCALE = 'id_ID'
+fake = Faker(FAKER_LOCALE)
+
+# Proses worker generation pool (spawn) ikut mengimpor modul ini; mereka hanya menjalankan shard,
+# jadi inisialisasi Gemini, SQLite (cache AI/job/output), dan thread latar dilewati di sana.
+# parent_process() baru terisi setelah modul __main__ anak dimuat ulang, sedangkan nama proses sudah di-set lebih dulu.
+IS_MAIN_PROCESS = multiprocessing.parent_process() is None and multiprocessing.current_process().name == 'MainProcess'
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-OUTPUT_DIR = os.path.join(BASE_DIR, 'generated_files')
+OUTPUT_DIR = os.getenv('OUTPUT_DIR', os.path.join(BASE_DIR, 'generated_files'))
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(BASE_DIR, 'cache'))
+os.makedirs(CACHE_DIR, exist_ok=True)
 
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+GEMINI_MODEL_NAME = 'gemini-1.5-flash-latest'
 gemini_model_instance = None
 
 # BARU: Jumlah saran AI yang diminta per kolom ai_text
 NUM_AI_SUGGESTIONS_PER_COLUMN = int(os.getenv('NUM_AI_SUGGESTIONS_PER_COLUMN', 20)) # Default 20 jika tidak ada di .env
+# Jumlah baris yang dihasilkan & ditulis per potongan (chunk); memori tetap terbatas berapa pun num_rows
+GENERATION_CHUNK_SIZE = int(os.getenv('GENERATION_CHUNK_SIZE', 50000))
+# Mode seed: ukuran blok baris tetap (mengabaikan chunk_size) agar output identik byte-per-byte
+DETERMINISTIC_BLOCK_ROWS = int(os.getenv('DETERMINISTIC_BLOCK_ROWS', 50000))
+EXCEL_MAX_ROWS = 1048576 # Batas baris lembar kerja Excel (termasuk baris header)
+# Format output: ekstensi file & apakah isinya sudah terkompresi (zip multi-tabel memakai mode stored)
+OUTPUT_FORMATS = {
+    'csv': ('csv', False),
+    'csv_gzip': ('csv.gz', True),
+    'csv_zstd': ('csv.zst', True),
+    'excel': ('xlsx', True),
+    'parquet': ('parquet', True),
+    'arrow': ('arrow', True),
+    'sqlite': ('sqlite', False),
+}
+ARROW_FORMATS = ('parquet', 'arrow', 'csv_zstd')
+# Target database: 'sqlite' menghasilkan satu file .sqlite berisi semua tabel; 'dbapi' memuat langsung ke
+# koneksi DB-API yang dikonfigurasi server lewat DATABASE_TARGETS (JSON), mis.
+#   {"lokal": {"module": "sqlite3", "connect": {"database": "/data/dev.sqlite"}}}
+# "dialect" opsional: 'sqlite' (default untuk modul sqlite3) atau 'standard' (default modul lain, mis. psycopg2).
+DATABASE_FORMATS = ('sqlite', 'dbapi')
+DATABASE_DIALECTS = ('sqlite', 'standard')
+DATABASE_TARGETS_JSON = os.getenv('DATABASE_TARGETS', '{}')
+SQL_TYPES = {'Int64': 'BIGINT', 'float64': 'DOUBLE PRECISION', 'boolean': 'BOOLEAN'}
+CSV_GZIP_LEVEL = int(os.getenv('CSV_GZIP_LEVEL', 6))
+PARQUET_COMPRESSION = os.getenv('PARQUET_COMPRESSION', 'zstd')
+ARROW_IPC_COMPRESSION = os.getenv('ARROW_IPC_COMPRESSION', 'zstd') or None
+# Unduhan streaming: ukuran blok byte yang dikirim & jumlah blok yang boleh menunggu klien (backpressure)
+STREAM_BUFFER_BYTES = int(os.getenv('STREAM_BUFFER_BYTES', 256 * 1024))
+STREAM_QUEUE_CHUNKS = int(os.getenv('STREAM_QUEUE_CHUNKS', 16))
+STREAM_MIMETYPES = {
+    'csv': 'text/csv',
+    'csv_gzip': 'application/gzip',
+    'csv_zstd': 'application/zstd',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file',
+}
+# Generasi multi-proses: jumlah proses, ambang baris per shard, dan metode start proses.
+# Setiap worker gunicorn punya pool sendiri, jadi total proses = jumlah worker x GENERATION_PROCESSES;
+# default sengaja kecil (maks. 2) — atur GENERATION_PROCESSES ~ jumlah CPU / jumlah worker.
+GENERATION_PROCESSES = int(os.getenv('GENERATION_PROCESSES', min(2, os.cpu_count() or 1)))
+PARALLEL_MIN_ROWS = int(os.getenv('PARALLEL_MIN_ROWS', 100000))
+GENERATION_MP_START_METHOD = os.getenv('GENERATION_MP_START_METHOD', 'spawn')
+# Job generasi asinkron: jumlah job yang berjalan bersamaan, interval pembaruan progres, & masa simpan status
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+JOB_PROGRESS_INTERVAL = float(os.getenv('JOB_PROGRESS_INTERVAL', 0.5))
+JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', 24 * 3600))
+# Job queued/running yang heartbeat-nya (dari worker pemiliknya) lebih tua dari batas ini dianggap gagal (worker mati/didaur ulang)
+JOB_HEARTBEAT_TIMEOUT = float(os.getenv('JOB_HEARTBEAT_TIMEOUT', 60))
+JOBS_DB_PATH = os.getenv('JOBS_DB_PATH', os.path.join(CACHE_DIR, 'jobs.sqlite3'))
+# Siklus hidup OUTPUT_DIR: file dihapus setelah tidak diakses selama TTL, total ukuran dibatasi kuota (LRU)
+OUTPUT_TTL_SECONDS = int(os.getenv('OUTPUT_TTL_SECONDS', 24 * 3600))
+OUTPUT_MAX_BYTES = int(os.getenv('OUTPUT_MAX_BYTES', 5 * 1024 ** 3)) # 0 = tanpa kuota
+OUTPUT_CLEANUP_INTERVAL = float(os.getenv('OUTPUT_CLEANUP_INTERVAL', 300))
+OUTPUT_INDEX_PATH = os.getenv('OUTPUT_INDEX_PATH', os.path.join(CACHE_DIR, 'outputs.sqlite3'))
+# Pool nilai Faker (fullname/address/email/text): 'off', 'lazy' (dibangun saat pertama dipakai) atau 'preload'.
+# Kolom bisa ikut/keluar per kolom lewat opsi pool=true/false. Pool disimpan di disk & dipetakan ke memori.
+FAKER_POOLS = os.getenv('FAKER_POOLS', 'off')
+FAKER_POOL_SIZE = int(os.getenv('FAKER_POOL_SIZE', 100000))
+FAKER_POOL_DIR = os.getenv('FAKER_POOL_DIR', os.path.join(CACHE_DIR, 'faker_pools'))
+# Pra-pengambilan saran AI berjalan paralel dengan batas laju (token bucket) dan retry saat kena rate limit
+AI_PREFETCH_MAX_WORKERS = int(os.getenv('AI_PREFETCH_MAX_WORKERS', 4))
+AI_REQUESTS_PER_MINUTE = float(os.getenv('AI_REQUESTS_PER_MINUTE', 60))
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', 4))
+AI_RETRY_BASE_DELAY = float(os.getenv('AI_RETRY_BASE_DELAY', 2.0))
+# Batas atas jumlah saran yang diminta untuk kolom ai_text unik (baris selebihnya diberi sufiks " (n)")
+AI_MAX_SUGGESTIONS_PER_COLUMN = int(os.getenv('AI_MAX_SUGGESTIONS_PER_COLUMN', 200))
+# Cache saran AI di disk (SQLite) yang dipakai bersama antar request & worker gunicorn
+AI_CACHE_PATH = os.getenv('AI_CACHE_PATH', os.path.join(CACHE_DIR, 'ai_suggestions.sqlite3'))
+AI_CACHE_TTL_SECONDS = int(os.getenv('AI_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+AI_CACHE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', 5000)) # 0 = cache nonaktif
 
-if GEMINI_API_KEY:
+if IS_MAIN_PROCESS and GEMINI_API_KEY:
     try:
         genai.configure(api_key=GEMINI_API_KEY)
-        gemini_model_instance = genai.GenerativeModel('gemini-1.5-flash-latest')
+        gemini_model_instance = genai.GenerativeModel(GEMINI_MODEL_NAME)
         print("Kunci API Gemini berhasil dimuat dan model diinisialisasi.")
     except Exception as e:
         print(f"Error saat konfigurasi API Gemini atau inisialisasi model: {e}")
         GEMINI_API_KEY = None
-else:
+elif IS_MAIN_PROCESS:
     print("GEMINI_API_KEY tidak ditemukan dalam file .env. Fitur AI akan terbatas/nonaktif.")
 
 def parse_options_str(options_str):
@@ -58,9 +166,131 @@ def parse_options_str(options_str):
     except Exception as e: print(f"Peringatan parse opsi: '{options_str}'. E: {e}")
     return params
 
+class TokenBucket:
+    def __init__(self, rate_per_sec, capacity):
+        self.rate = rate_per_sec
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+ai_rate_limiter = TokenBucket(AI_REQUESTS_PER_MINUTE / 60.0, AI_PREFETCH_MAX_WORKERS)
+ai_prefetch_executor = ThreadPoolExecutor(max_workers=AI_PREFETCH_MAX_WORKERS, thread_name_prefix='ai-prefetch')
+
+def is_rate_limit_error(e):
+    if isinstance(e, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)): return True
+    msg = str(e).lower()
+    return '429' in msg or 'rate limit' in msg or 'resource exhausted' in msg
+
+def generate_content_with_retry(model, prompt, generation_config, label, rate_limiter=None):
+    limiter = rate_limiter or ai_rate_limiter
+    for attempt in range(AI_MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            return model.generate_content(prompt, generation_config=generation_config)
+        except Exception as e:
+            if attempt >= AI_MAX_RETRIES or not is_rate_limit_error(e): raise
+            # Backoff eksponensial dengan jitter agar worker tidak mencoba ulang bersamaan
+            delay = AI_RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5)
+            print(f"  Rate limit AI untuk {label} (percobaan {attempt + 1}/{AI_MAX_RETRIES + 1}), mencoba lagi dalam {delay:.1f} detik...")
+            time.sleep(delay)
+
+class AISuggestionCache:
+    # Kunci = hash SHA-256 dari input prompt + num_suggestions; entri kedaluwarsa setelah TTL
+    # dan entri yang paling lama tidak diakses dibuang saat jumlah entri melebihi batas (LRU).
+    # Entri yang dipakai generasi ber-seed di-pin: tidak kedaluwarsa & tidak pernah dibuang.
+    def __init__(self, path, ttl_seconds, max_entries):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS suggestions (key TEXT PRIMARY KEY, suggestions TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_suggestions_last_access ON suggestions (last_access)")
+            try: conn.execute("ALTER TABLE suggestions ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0")
+            except sqlite3.OperationalError: pass # Kolom sudah ada
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def make_key(table_name, col_name, database_context, user_hint, num_suggestions, model_name=GEMINI_MODEL_NAME):
+        payload = json.dumps([model_name, table_name, col_name, database_context, user_hint, num_suggestions], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key, pinned=False):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT suggestions, created_at, pinned FROM suggestions WHERE key = ?", (key,)).fetchone()
+            if row is not None and not (pinned or row[2]) and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM suggestions WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'misses'")
+                return None
+            conn.execute("UPDATE suggestions SET last_access = ?, pinned = MAX(pinned, ?) WHERE key = ?", (now, int(pinned), key))
+            conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'hits'")
+            return json.loads(row[0])
+
+    def set(self, key, suggestions, pinned=False):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO suggestions (key, suggestions, created_at, last_access, pinned) VALUES (?, ?, ?, ?, ?)",
+                         (key, json.dumps(suggestions, ensure_ascii=False), now, now, int(pinned)))
+            evicted = conn.execute("DELETE FROM suggestions WHERE pinned = 0 AND created_at < ?", (now - self.ttl_seconds,)).rowcount
+            evicted += conn.execute("DELETE FROM suggestions WHERE key IN (SELECT key FROM suggestions WHERE pinned = 0 ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                                    (self.max_entries,)).rowcount
+            if evicted:
+                conn.execute("UPDATE counters SET value = value + ? WHERE name = 'evictions'", (evicted,))
+
+    def stats(self):
+        with self._connect() as conn:
+            stats = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            stats['entries'] = conn.execute("SELECT COUNT(*) FROM suggestions").fetchone()[0]
+            stats['pinned'] = conn.execute("SELECT COUNT(*) FROM suggestions WHERE pinned = 1").fetchone()[0]
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+ai_suggestions_cache = AISuggestionCache(AI_CACHE_PATH, AI_CACHE_TTL_SECONDS, AI_CACHE_MAX_ENTRIES) if AI_CACHE_MAX_ENTRIES > 0 and IS_MAIN_PROCESS else None
+
+def fetch_ai_suggestions_cached(col_name, table_name, database_context, user_hint, num_suggestions, model=None, cache=None, pinned=False, **kwargs):
+    cache = cache if cache is not None else ai_suggestions_cache
+    cache_key = None
+    if cache is not None:
+        cache_key = AISuggestionCache.make_key(table_name, col_name, database_context, user_hint, num_suggestions)
+        cached = cache.get(cache_key, pinned=pinned)
+        if cached is not None:
+            print(f"  Saran AI untuk {table_name}.{col_name} diambil dari cache.")
+            generation_metrics.increment('ai_cache_hits')
+            return cached
+    started = time.perf_counter()
+    suggestions = generate_ai_suggestions_list(col_name=col_name, table_name=table_name, database_context=database_context,
+                                               user_hint=user_hint, num_suggestions=num_suggestions, model=model, **kwargs)
+    generation_metrics.record_stage('ai_fetch', time.perf_counter() - started)
+    generation_metrics.increment('ai_requests')
+    if cache is not None and suggestions: # Jangan cache kegagalan (daftar kosong)
+        cache.set(cache_key, suggestions, pinned=pinned)
+    return suggestions
+
 # MODIFIKASI: Fungsi ini sekarang meminta *DAFTAR* saran
-def generate_ai_suggestions_list(col_name, table_name, database_context="data umum", user_hint="", num_suggestions=NUM_AI_SUGGESTIONS_PER_COLUMN, temperature=0.7, max_tokens_multiplier=30):
-    if not gemini_model_instance:
+def generate_ai_suggestions_list(col_name, table_name, database_context="data umum", user_hint="", num_suggestions=NUM_AI_SUGGESTIONS_PER_COLUMN, temperature=0.7, max_tokens_multiplier=30, model=None):
+    model = model or gemini_model_instance
+    if not model:
         print("Peringatan: Model AI tidak tersedia untuk generate_ai_suggestions_list.")
         return []
     try:
@@ -99,7 +329,7 @@ def generate_ai_suggestions_list(col_name, table_name, database_context="data um
         )
         print(f"  Meminta {num_suggestions} saran AI untuk {table_name}.{col_name} (max_tokens: {estimated_max_tokens})...")
         
-        response = gemini_model_instance.generate_content(full_prompt, generation_config=generation_config)
+        response = generate_content_with_retry(model, full_prompt, generation_config, f"{table_name}.{col_name}")
         
         content = response.text.strip()
         # Membersihkan jika ada ```json ... ``` (meskipun response_mime_type seharusnya menangani ini)
@@ -130,66 +360,1389 @@ def generate_ai_suggestions_list(col_name, table_name, database_context="data um
         traceback.print_exc()
         return []
 
-# MODIFIKASI: generate_value sekarang menggunakan ai_suggestions_list untuk tipe 'ai_text'
-def generate_value(col_name, table_name, col_type, col_options_str, database_context="data umum", 
-                   existing_values_set=None, nullable=False, nullable_chance=0, 
-                   ai_suggestions_list=None): # Parameter baru
-    if nullable and random.randint(1, 100) <= nullable_chance:
+# --- Mesin generasi kolumnar ---
+# Setiap definisi kolom dikompilasi SEKALI menjadi objek generator, lalu nilai
+# dihasilkan per kolom secara massal (array NumPy / batch) alih-alih per sel.
+#
+# Kolom unik memakai strategi berbasis indeks baris global: baris ke-k dipetakan lewat
+# permutasi pseudo-acak ke nilai ke-k dari ruang nilai kolom. Hasilnya unik tanpa
+# loop penolakan dan tanpa menyimpan himpunan nilai yang sudah dipakai.
+
+MAX_UNIQUE_TRIES = 10 # Hanya untuk tipe Faker (fullname/address/text) sebelum diberi sufiks
+MAX_PERMUTATION_SIZE = 1 << 62
+# float64 hanya menyimpan ~15-17 digit signifikan; precision lebih besar tidak bermakna
+FLOAT_MAX_PRECISION = 15
+ASCII_LETTER_CODES = np.frombuffer(string.ascii_letters.encode('ascii'), dtype=np.uint8)
+UNIX_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+HEX_DIGIT_CODES = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+UUID_HEX_POSITIONS = np.array([i for i in range(36) if i not in (8, 13, 18, 23)])
+
+def parse_date_option(value, default):
+    if value is None: value = default
+    if value == 'today': return datetime.date.today()
+    return datetime.datetime.strptime(str(value), '%Y-%m-%d').date()
+
+class IndexPermutation:
+    # Bijeksi pseudo-acak atas [0, size): jaringan Feistel 4 putaran pada domain 2^bits
+    # ditambah cycle walking untuk nilai di luar rentang. Tervektorisasi penuh.
+    MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+    def __init__(self, size, key_seed):
+        self.size = min(int(size), MAX_PERMUTATION_SIZE)
+        bits = max(2, (self.size - 1).bit_length())
+        bits += bits % 2
+        self.half_bits = np.uint64(bits // 2)
+        self.half_mask = np.uint64((1 << (bits // 2)) - 1)
+        self.keys = np.random.default_rng(key_seed).integers(0, MAX_PERMUTATION_SIZE, 4, dtype=np.uint64)
+
+    def _encrypt(self, x):
+        left, right = x >> self.half_bits, x & self.half_mask
+        for key in self.keys:
+            mixed = (right ^ key) * self.MULTIPLIER
+            mixed ^= mixed >> np.uint64(29)
+            left, right = right, left ^ (mixed & self.half_mask)
+        return (left << self.half_bits) | right
+
+    def __call__(self, indices):
+        x = self._encrypt(np.asarray(indices, dtype=np.uint64))
+        outside = x >= self.size
+        while outside.any():
+            x[outside] = self._encrypt(x[outside])
+            outside = x >= self.size
+        return x.astype(np.int64)
+
+def encode_base52(numbers, width):
+    # Representasi huruf ASCII lebar-tetap dari bilangan bulat (untuk string unik)
+    digits = np.empty((len(numbers), width), dtype=np.uint8)
+    rest = np.asarray(numbers, dtype=np.int64).copy()
+    for pos in range(width - 1, -1, -1):
+        digits[:, pos] = ASCII_LETTER_CODES[rest % 52]
+        rest //= 52
+    return digits
+
+# --- Pool nilai Faker ---
+# Pemanggilan provider Faker per sel (terutama address & paragraph) mendominasi waktu generasi.
+# Dalam mode pool, nilai locale dibangun SEKALI (Faker ber-seed tetap -> isi pool identik di semua worker),
+# disimpan sebagai tabel string berbasis array (blob UTF-8 + offset) dan dipetakan ke memori sehingga
+# halaman yang sama dibagi oleh semua worker gunicorn & proses shard. Generasi mengambil nilai per indeks.
+
+# nama pool -> (pembuat nilai, hanya simpan nilai berbeda, substring yang tidak boleh muncul)
+# Komponen pertama kombinasi unik tidak boleh memuat pemisahnya sehingga setiap gabungan tetap unik.
+FAKER_POOL_SPECS = {
+    'name': (lambda f: f.name(), False, None),
+    'address': (lambda f: f.address().replace('\n', ', '), False, None),
+    'email': (lambda f: f.email(), False, None),
+    'paragraph': (lambda f: f.paragraph(nb_sentences=f.random_int(2, 5)), False, None),
+    'first_name': (lambda f: f.first_name(), True, ' '),
+    'last_name': (lambda f: f.last_name(), True, None),
+    'street_address': (lambda f: f.street_address(), True, ', '),
+    'locality': (lambda f: f"{f.city()}, {f.state_abbr()} {f.postcode()}", True, None),
+    'sentence_stem': (lambda f: f.sentence().rstrip('.'), True, '. '),
+    'sentence': (lambda f: f.sentence(), True, None),
+}
+
+class StringPool:
+    def __init__(self, path):
+        self.offsets = np.load(f"{path}.offsets.npy", mmap_mode='r')
+        with open(f"{path}.data", 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def take(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        data = self.data
+        return [data[start:end].decode('utf-8') for start, end in zip(self.offsets[indices].tolist(), self.offsets[indices + 1].tolist())]
+
+    @staticmethod
+    def write(path, values):
+        # Tulis ke file sementara lalu os.replace (atomik): worker lain yang membangun pool sama tidak saling rusak;
+        # file offset ditulis terakhir karena keberadaannya menandai pool siap dipakai
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        suffix = f".tmp{os.getpid()}_{threading.get_ident()}"
+        with open(f"{path}.data{suffix}", 'wb') as f: f.write(b''.join(encoded))
+        with open(f"{path}.offsets.npy{suffix}", 'wb') as f: np.save(f, offsets)
+        os.replace(f"{path}.data{suffix}", f"{path}.data")
+        os.replace(f"{path}.offsets.npy{suffix}", f"{path}.offsets.npy")
+
+def build_faker_pool_values(pool_name, size):
+    make_value, distinct, forbidden = FAKER_POOL_SPECS[pool_name]
+    pool_faker = Faker(FAKER_LOCALE)
+    pool_faker.seed_instance(stable_hash(pool_name))
+    values = [value for value in (make_value(pool_faker) for _ in range(size)) if not forbidden or forbidden not in value]
+    return list(dict.fromkeys(values)) if distinct else values
+
+_faker_pools = {}
+_faker_pools_lock = threading.Lock()
+
+def get_faker_pool(pool_name):
+    with _faker_pools_lock:
+        pool = _faker_pools.get(pool_name)
+        if pool is None:
+            path = os.path.join(FAKER_POOL_DIR, f"{FAKER_LOCALE}_{pool_name}_{FAKER_POOL_SIZE}_{FAKER_VERSION}")
+            if not os.path.exists(f"{path}.offsets.npy"):
+                print(f"  Membangun pool Faker '{pool_name}' ({FAKER_POOL_SIZE} sampel)...")
+                os.makedirs(FAKER_POOL_DIR, exist_ok=True)
+                with generation_metrics.timed('faker_pool_build'):
+                    StringPool.write(path, build_faker_pool_values(pool_name, FAKER_POOL_SIZE))
+            pool = _faker_pools[pool_name] = StringPool(path)
+        return pool
+
+def preload_faker_pools():
+    try:
+        for pool_name in FAKER_POOL_SPECS: get_faker_pool(pool_name)
+        print("Pool Faker siap dipakai.")
+    except Exception as e:
+        print(f"Error saat membangun pool Faker: {e}")
+
+class ColumnGenerator:
+    # dtype pandas yang dipakai jika kolom berisi null
+    null_dtype = object
+    # True jika keunikan tetap terjamin saat tabel dipecah menjadi beberapa shard
+    unique_shard_safe = True
+    # False jika validate() melaporkan error (diisi compile_table); kolom seperti ini tidak di-prepare
+    valid = True
+
+    def __init__(self, col_def, table_name, options, key_seed=None, faker=None):
+        self.name = col_def['name']
+        self.type = col_def['type']
+        self.table_name = table_name
+        self.options = options
+        self.unique = bool(col_def.get('unique'))
+        self.nullable = bool(col_def.get('nullable', False))
+        self.nullable_chance = int(col_def.get('nullable_chance', 0) or 0)
+        # Kunci permutasi unik harus sama untuk semua potongan/shard satu tabel
+        self.key_seed = key_seed if key_seed is not None else np.random.SeedSequence().entropy
+        self.permutation = None
+        self.seen = None
+        # Instans Faker milik shard (di-seed per blok baris); default ke instans global
+        self.fake = faker or fake
+
+    @property
+    def label(self):
+        return f"Kolom '{self.table_name}.{self.name}' (tipe: {self.type})"
+
+    @property
+    def shard_safe(self):
+        return not self.unique or self.unique_shard_safe
+
+    def validate(self):
+        # Dipanggil sekali saat kompilasi skema; kembalikan semua error opsi kolom
+        if not 0 <= self.nullable_chance <= 100: return [f"{self.label} nullable_chance harus 0-100."]
+        return []
+
+    def __getstate__(self):
+        # Instans Faker tidak ikut dikirim ke proses shard; shard memasang instansnya sendiri
+        state = self.__dict__.copy()
+        state['fake'] = None
+        return state
+
+    def for_shard(self, faker):
+        # Salinan dangkal per shard: opsi & array beku dipakai bersama, status unik disiapkan ulang oleh prepare
+        gen = copy.copy(self)
+        gen.fake = faker
+        gen.permutation = None
+        gen.seen = None
+        return gen
+
+    def unique_capacity(self):
+        # Jumlah maksimum nilai berbeda; None = praktis tak terbatas
         return None
-    
-    options = parse_options_str(col_options_str)
-    val = None
-
-    if col_type == 'ai_text':
-        if ai_suggestions_list: # Gunakan daftar saran yang sudah ada
-            if not ai_suggestions_list: # Jika daftar kosong (misal AI gagal)
-                 val = f"Data AI tidak tersedia (saran kosong untuk {col_name})"
-            elif existing_values_set is not None:
-                # Jika kolom harus unik, coba cari yang unik dari daftar saran
-                available_suggestions = [s for s in ai_suggestions_list if s not in existing_values_set]
-                if available_suggestions:
-                    val = random.choice(available_suggestions)
-                    existing_values_set.add(val)
-                else:
-                    # Tidak ada saran unik tersisa, ambil saja salah satu (bisa duplikat)
-                    # atau jika nullable, pertimbangkan untuk mengembalikan None
-                    # Ini adalah kompromi jika num_rows > num_suggestions unik
-                    print(f"Peringatan: Tidak ada saran AI unik yang tersisa untuk kolom '{col_name}' (unik). Menggunakan nilai acak dari daftar.")
-                    val = random.choice(ai_suggestions_list) 
-                    # existing_values_set.add(val) # Jangan tambahkan jika bisa duplikat & sudah ada
-            else: # Kolom tidak perlu unik
-                val = random.choice(ai_suggestions_list)
-            return val # Langsung return, tidak perlu loop unik di bawah untuk ai_text
+
+    def permutation_size(self, num_rows):
+        return self.unique_capacity()
+
+    def prepare(self, num_rows):
+        # Dipanggil sekali per tabel sebelum generasi; mengembalikan pesan error jika unik mustahil
+        if not self.unique: return None
+        capacity = self.unique_capacity()
+        if capacity is not None and capacity < num_rows:
+            return f"{self.label} unik hanya punya {capacity} nilai berbeda, tetapi diminta {num_rows} baris."
+        size = self.permutation_size(num_rows)
+        if size is not None:
+            self.permutation = IndexPermutation(size, self.key_seed)
         else:
-            # Ini seharusnya tidak terjadi jika alur pra-pengambilan berfungsi
-            print(f"Peringatan: Tidak ada daftar saran AI yang diberikan untuk {col_name} di {table_name}. Mengembalikan placeholder.")
-            return f"AI suggestions not pre-fetched for {col_name}"
-
-    # Logika untuk tipe data lain (tidak berubah)
-    max_unique_tries = 100
-    tries = 0
-    while tries < max_unique_tries:
-        if col_type == 'string': min_l = options.get('min_len', 5); max_l = options.get('max_len', 20); val = fake.pystr(min_chars=min_l, max_chars=max_l)
-        elif col_type == 'text': val = fake.paragraph(nb_sentences=random.randint(2,5))
-        elif col_type == 'integer': min_v=options.get('min',0);max_v=options.get('max',1000);val=random.randint(min_v,max_v)
-        elif col_type == 'float': min_v=options.get('min',0.0);max_v=options.get('max',100.0);prec=options.get('precision',2);val=round(random.uniform(min_v,max_v),prec)
-        elif col_type == 'date': s_dt=options.get('start','2000-01-01');e_dt=options.get('end','today');s_d=datetime.datetime.strptime(s_dt,'%Y-%m-%d').date() if s_dt!='today' else datetime.date.today();e_d=datetime.date.today() if e_dt=='today' else datetime.datetime.strptime(e_dt,'%Y-%m-%d').date();val=fake.date_between_dates(date_start=s_d,date_end=e_d).strftime('%Y-%m-%d')
-        elif col_type == 'email': val = fake.email()
-        elif col_type == 'fullname': val = fake.name()
-        elif col_type == 'address': val = fake.address().replace('\n',', ')
-        elif col_type == 'uuid': val = str(uuid.uuid4())
-        elif col_type == 'boolean': val = random.choice([True, False])
-        elif col_type == 'custom_list': itms_s=col_options_str;itms=[i.strip() for i in itms_s.split(',') if i.strip()];val=random.choice(itms) if itms else ""
-        else: val = f"Tipe tdk dikenal: {col_type}"
-        
-        if existing_values_set is None or val not in existing_values_set:
-            if existing_values_set is not None and val is not None: # Pastikan val bukan None sebelum menambah ke set
-                existing_values_set.add(val)
+            self.seen = set()
+        return None
+
+    def sample(self, n, rng):
+        raise NotImplementedError
+
+    def sample_unique(self, indices, rng):
+        # Bawaan: ambil nilai ke-perm(k) dari ruang nilai kolom
+        return self.values_at(self.permutation(indices))
+
+    def values_at(self, positions):
+        raise NotImplementedError
+
+    def null_mask(self, n, rng):
+        if not (self.nullable and self.nullable_chance > 0): return None
+        # Setara dengan random.randint(1, 100) <= nullable_chance per sel
+        mask = rng.integers(1, 101, n) <= self.nullable_chance
+        return mask if mask.any() else None
+
+    def generate(self, n, rng, row_offset=0):
+        mask = self.null_mask(n, rng)
+        if self.unique:
+            if self.permutation is None and self.seen is None: self.prepare(row_offset + n)
+            positions = np.arange(n) if mask is None else np.flatnonzero(~mask)
+            values = self.sample_unique(positions + row_offset, rng)
+        else:
+            values = self.sample(n if mask is None else int(n - mask.sum()), rng)
+        return self.assemble(values, mask, n)
+
+    def assemble(self, values, mask, n):
+        if mask is None:
+            return values if isinstance(values, np.ndarray) else np.asarray(values, dtype=object)
+        valid = ~mask
+        if self.null_dtype == 'Int64':
+            data = np.zeros(n, dtype=np.int64); data[valid] = values
+            return pd.arrays.IntegerArray(data, mask)
+        if self.null_dtype == 'boolean':
+            data = np.zeros(n, dtype=bool); data[valid] = values
+            return pd.arrays.BooleanArray(data, mask)
+        if self.null_dtype == 'float64':
+            data = np.full(n, np.nan); data[valid] = values
+            return data
+        data = np.full(n, None, dtype=object)
+        data[valid] = np.asarray(values, dtype=object) if len(values) else []
+        return data
+
+class StringColumn(ColumnGenerator):
+    def __init__(self, col_def, table_name, options, key_seed=None, faker=None):
+        super().__init__(col_def, table_name, options, key_seed, faker)
+        self.min_len = int(options.get('min_len', 5))
+        self.max_len = int(options.get('max_len', 20))
+        self.index_width = 0
+
+    def validate(self):
+        errors = super().validate()
+        if self.min_len < 0: errors.append(f"{self.label} min_len tidak boleh negatif.")
+        if self.min_len > self.max_len: errors.append(f"{self.label} min_len ({self.min_len}) lebih besar dari max_len ({self.max_len}).")
+        # Nilai unik butuh sufiks indeks minimal satu huruf
+        if self.unique and self.max_len < 1: errors.append(f"{self.label} unik membutuhkan max_len minimal 1.")
+        return errors
+
+    def unique_capacity(self):
+        return 52 ** self.max_len
+
+    def permutation_size(self, num_rows):
+        # Lebar sufiks indeks (huruf base-52) cukup untuk num_rows nilai
+        self.index_width = 1
+        while 52 ** self.index_width < num_rows: self.index_width += 1
+        return 52 ** self.index_width
+
+    def _letters(self, lengths, rng):
+        blob = ASCII_LETTER_CODES[rng.integers(0, len(ASCII_LETTER_CODES), int(lengths.sum()))].tobytes().decode('ascii')
+        ends = np.cumsum(lengths)
+        return [blob[s:e] for s, e in zip((ends - lengths).tolist(), ends.tolist())]
+
+    def sample(self, n, rng):
+        # Setara fake.pystr: huruf ASCII acak dengan panjang acak, dibuat dalam satu blob
+        return self._letters(rng.integers(self.min_len, self.max_len + 1, n), rng)
+
+    def sample_unique(self, indices, rng):
+        # Prefiks acak + sufiks lebar-tetap hasil permutasi indeks -> unik secara deterministik
+        width = self.index_width
+        lengths = rng.integers(max(self.min_len, width), self.max_len + 1, len(indices))
+        prefixes = self._letters(lengths - width, rng)
+        suffix_blob = encode_base52(self.permutation(indices), width).tobytes().decode('ascii')
+        return [p + suffix_blob[i:i + width] for p, i in zip(prefixes, range(0, width * len(indices), width))]
+
+class IntegerColumn(ColumnGenerator):
+    null_dtype = 'Int64'
+
+    def __init__(self, col_def, table_name, options, key_seed=None, faker=None):
+        super().__init__(col_def, table_name, options, key_seed, faker)
+        self.min_v = int(options.get('min', 0))
+        self.max_v = int(options.get('max', 1000))
+
+    def validate(self):
+        errors = super().validate()
+        info = np.iinfo(np.int64)
+        for key, value in (('min', self.min_v), ('max', self.max_v)):
+            if not info.min <= value <= info.max: errors.append(f"{self.label} {key} ({value}) di luar rentang integer 64-bit.")
+        if self.min_v > self.max_v: errors.append(f"{self.label} min ({self.min_v}) lebih besar dari max ({self.max_v}).")
+        return errors
+
+    def unique_capacity(self):
+        return max(0, self.max_v - self.min_v + 1)
+
+    def sample(self, n, rng):
+        return rng.integers(self.min_v, self.max_v, n, dtype=np.int64, endpoint=True)
+
+    def unique_stride(self):
+        # Rentang > MAX_PERMUTATION_SIZE: posisi permutasi diberi jarak tetap agar nilai tersebar sampai mendekati max
+        return max(1, -(-self.unique_capacity() // MAX_PERMUTATION_SIZE))
+
+    def permutation_size(self, num_rows):
+        return -(-self.unique_capacity() // self.unique_stride())
+
+    def values_at(self, positions):
+        # Aritmetika uint64 modular (hasil akhirnya pasti di dalam [min, max]) menghindari overflow int64 perantara
+        offsets = np.asarray(positions, dtype=np.uint64) * np.uint64(self.unique_stride())
+        return (offsets + np.uint64(self.min_v % (1 << 64))).view(np.int64)
+
+class FloatColumn(ColumnGenerator):
+    null_dtype = 'float64'
+
+    def __init__(self, col_def, table_name, options, key_seed=None, faker=None):
+        super().__init__(col_def, table_name, options, key_seed, faker)
+        self.min_v = float(options.get('min', 0.0))
+        self.max_v = float(options.get('max', 100.0))
+        self.precision = int(options.get('precision', 2))
+
+    def validate(self):
+        errors = super().validate()
+        if not (np.isfinite(self.min_v) and np.isfinite(self.max_v)):
+            errors.append(f"{self.label} min dan max harus bilangan berhingga.")
+            return errors
+        if self.min_v > self.max_v: errors.append(f"{self.label} min ({self.min_v}) lebih besar dari max ({self.max_v}).")
+        elif not np.isfinite(self.max_v - self.min_v): errors.append(f"{self.label} rentang min-max terlalu besar untuk float64.")
+        if self.precision < 0: errors.append(f"{self.label} precision tidak boleh negatif.")
+        elif self.precision > FLOAT_MAX_PRECISION: errors.append(f"{self.label} precision maksimal {FLOAT_MAX_PRECISION} (batas digit signifikan float64).")
+        # Grid 10^-precision harus bisa direpresentasikan float64 di sekitar min/max; jika lebih rapat
+        # dari jarak antar-float, titik grid yang berbeda membulat ke nilai yang sama (duplikat diam-diam)
+        elif self.unique and 10.0 ** -self.precision < np.spacing(max(abs(self.min_v), abs(self.max_v))):
+            errors.append(f"{self.label} unik: precision {self.precision} terlalu halus untuk nilai sebesar "
+                          f"{max(abs(self.min_v), abs(self.max_v)):g} (resolusi float64 {np.spacing(max(abs(self.min_v), abs(self.max_v))):g}).")
+        return errors
+
+    def unique_capacity(self):
+        # Nilai unik diambil dari grid berjarak 10^-precision di dalam [min, max]
+        return max(0, int(np.floor((self.max_v - self.min_v) * 10 ** self.precision + 1e-9)) + 1)
+
+    def sample(self, n, rng):
+        return np.round(rng.uniform(self.min_v, self.max_v, n), self.precision)
+
+    def values_at(self, positions):
+        return np.round(self.min_v + positions / 10 ** self.precision, self.precision)
+
+class DateColumn(ColumnGenerator):
+    def __init__(self, col_def, table_name, options, key_seed=None, faker=None):
+        super().__init__(col_def, table_name, options, key_seed, faker)
+        self.start_ordinal = parse_date_option(options.get('start'), '2000-01-01').toordinal()
+        self.end_ordinal = parse_date_option(options.get('end'), 'today').toordinal()
+
+    def validate(self):
+        errors = super().validate()
+        if self.start_ordinal > self.end_ordinal: errors.append(f"{self.label} start lebih besar dari end.")
+        return errors
+
+    def unique_capacity(self):
+        return max(0, self.end_ordinal - self.start_ordinal + 1)
+
+    def _format(self, ordinals):
+        return (ordinals - UNIX_EPOCH_ORDINAL).astype('datetime64[D]').astype(str).astype(object)
+
+    def sample(self, n, rng):
+        return self._format(rng.integers(self.start_ordinal, self.end_ordinal + 1, n))
+
+    def values_at(self, positions):
+        return self._format(positions + self.start_ordinal)
+
+class FakerColumn(ColumnGenerator):
+    # fullname/address/text: nilai unik dicoba ulang beberapa kali, lalu diberi sufiks indeks baris.
+    # Mode pool: nilai diambil per indeks dari pool_name; nilai unik adalah kombinasi komponen pool_parts
+    # (radix campuran lewat permutasi indeks, aman lintas shard) dengan sufiks " (n)" jika kombinasi habis.
+    unique_shard_safe = False
+    pool_name = None
+    pool_parts = ()
+    pool_separator = ' '
+
+    def __init__(self, col_def, table_name, options, provider_name, key_seed=None, faker=None):
+        super().__init__(col_def, table_name, options, key_seed, faker)
+        self.provider_name = provider_name
+        self.use_pool = options.get('pool', FAKER_POOLS != 'off')
+        self.pool_capacity = None
+
+    @property
+    def pooled(self):
+        return self.use_pool is True and self.pool_name is not None
+
+    @property
+    def shard_safe(self):
+        return not self.unique or self.unique_shard_safe or (self.pooled and bool(self.pool_parts))
+
+    def validate(self):
+        errors = super().validate()
+        if not isinstance(self.use_pool, bool): errors.append(f"{self.label} opsi pool harus true atau false.")
+        return errors
+
+    def prepare(self, num_rows):
+        # Pool dibangun/dimuat di proses utama sebelum shard berjalan
+        if self.pooled:
+            get_faker_pool(self.pool_name)
+            if self.unique:
+                for part in self.pool_parts: get_faker_pool(part)
+        return super().prepare(num_rows)
+
+    def permutation_size(self, num_rows):
+        if not (self.pooled and self.pool_parts): return None
+        self.pool_capacity = 1
+        for part in self.pool_parts: self.pool_capacity *= len(get_faker_pool(part))
+        # Hanya baris di atas kapasitas kombinasi yang mendapat sufiks putaran
+        return max(self.pool_capacity, num_rows)
+
+    def values_at(self, positions):
+        rounds, combos = np.divmod(positions, self.pool_capacity)
+        columns = []
+        for part in reversed(self.pool_parts):
+            pool = get_faker_pool(part)
+            combos, digits = np.divmod(combos, len(pool))
+            columns.append(pool.take(digits))
+        values = [self.pool_separator.join(parts) for parts in zip(*reversed(columns))]
+        return [f"{value} ({r + 1})" if r else value for value, r in zip(values, rounds.tolist())]
+
+    def sample(self, n, rng):
+        if self.pooled:
+            pool = get_faker_pool(self.pool_name)
+            return pool.take(rng.integers(0, len(pool), n))
+        return self.sample_faker(n, rng)
+
+    def sample_faker(self, n, rng):
+        provider = getattr(self.fake, self.provider_name)
+        return [provider() for _ in range(n)]
+
+    def sample_unique(self, indices, rng):
+        if self.permutation is not None: return super().sample_unique(indices, rng)
+        values = self.sample(len(indices), rng)
+        seen = self.seen
+        pending = []
+        for i, val in enumerate(values):
+            if val in seen: pending.append(i)
+            else: seen.add(val)
+        tries = 0
+        while pending and tries < MAX_UNIQUE_TRIES:
+            still_pending = []
+            for i, val in zip(pending, self.sample(len(pending), rng)):
+                values[i] = val
+                if val in seen: still_pending.append(i)
+                else: seen.add(val)
+            pending = still_pending
+            tries += 1
+        for i in pending:
+            values[i] = f"{values[i]} ({int(indices[i]) + 1})"
+            seen.add(values[i])
+        return values
+
+class FullNameColumn(FakerColumn):
+    pool_name = 'name'
+    pool_parts = ('first_name', 'last_name')
+
+    def __init__(self, col_def, table_name, options, key_seed=None, faker=None):
+        super().__init__(col_def, table_name, options, 'name', key_seed, faker)
+
+class TextColumn(FakerColumn):
+    pool_name = 'paragraph'
+    pool_parts = ('sentence_stem', 'sentence')
+    pool_separator = '. '
+
+    def __init__(self, col_def, table_name, options, key_seed=None, faker=None):
+        super().__init__(col_def, table_name, options, None, key_seed, faker)
+
+    def sample_faker(self, n, rng):
+        paragraph = self.fake.paragraph
+        return [paragraph(nb_sentences=k) for k in rng.integers(2, 6, n).tolist()]
+
+class AddressColumn(FakerColumn):
+    pool_name = 'address'
+    pool_parts = ('street_address', 'locality')
+    pool_separator = ', '
+
+    def __init__(self, col_def, table_name, options, key_seed=None, faker=None):
+        super().__init__(col_def, table_name, options, None, key_seed, faker)
+
+    def sample_faker(self, n, rng):
+        address = self.fake.address
+        return [address().replace('\n', ', ') for _ in range(n)]
+
+class EmailColumn(FakerColumn):
+    unique_shard_safe = True
+    pool_name = 'email'
+
+    def __init__(self, col_def, table_name, options, key_seed=None, faker=None):
+        super().__init__(col_def, table_name, options, 'email', key_seed, faker)
+
+    def sample_unique(self, indices, rng):
+        # Counter indeks baris disisipkan sebelum '@' (bagian setelah titik terakhir selalu berbeda)
+        values = self.sample(len(indices), rng)
+        return [f"{local}.{k + 1}@{domain}" for (local, _, domain), k in zip((v.partition('@') for v in values), indices.tolist())]
+
+class UUIDColumn(ColumnGenerator):
+    def permutation_size(self, num_rows):
+        return None
+
+    def sample(self, n, rng):
+        # UUID v4 dibuat massal: set bit versi/varian lalu format hex dalam satu blob ASCII
+        raw = rng.integers(0, 256, (n, 16), dtype=np.uint8)
+        raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+        raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+        hex_codes = HEX_DIGIT_CODES[np.stack((raw >> 4, raw & 0x0F), axis=2).reshape(n, 32)]
+        text = np.full((n, 36), ord('-'), dtype=np.uint8)
+        text[:, UUID_HEX_POSITIONS] = hex_codes
+        blob = text.tobytes().decode('ascii')
+        return [blob[i:i + 36] for i in range(0, 36 * n, 36)]
+
+    def sample_unique(self, indices, rng):
+        # 122 bit acak: tabrakan praktis mustahil, tidak perlu pelacakan
+        return self.sample(len(indices), rng)
+
+class BooleanColumn(ColumnGenerator):
+    null_dtype = 'boolean'
+
+    def unique_capacity(self):
+        return 2
+
+    def sample(self, n, rng):
+        return rng.integers(0, 2, n).astype(bool)
+
+    def values_at(self, positions):
+        return positions.astype(bool)
+
+class ChoiceColumn(ColumnGenerator):
+    # Dipakai untuk custom_list; sampling berdasarkan indeks ke array pilihan yang dibekukan
+    def __init__(self, col_def, table_name, options, choices, key_seed=None, faker=None):
+        super().__init__(col_def, table_name, options, key_seed, faker)
+        self.set_choices(choices)
+
+    def set_choices(self, choices):
+        self.choices = np.asarray(choices, dtype=object)
+        # Kolom unik = sampling tanpa pengembalian dari pilihan yang berbeda
+        self.distinct_choices = np.asarray(list(dict.fromkeys(choices)), dtype=object)
+
+    def validate(self):
+        errors = super().validate()
+        if not len(self.choices): errors.append(f"{self.label} membutuhkan daftar pilihan (item1,item2,...).")
+        return errors
+
+    def unique_capacity(self):
+        return len(self.distinct_choices)
+
+    @property
+    def arrow_dictionary(self):
+        # True jika semua nilai yang dihasilkan berasal dari distinct_choices (kamus Arrow tetap)
+        return len(self.distinct_choices) > 0
+
+    def sample(self, n, rng):
+        if not len(self.choices):
+            return np.full(n, "", dtype=object)
+        return self.choices[rng.integers(0, len(self.choices), n)]
+
+    def values_at(self, positions):
+        return self.distinct_choices[positions]
+
+class AITextColumn(ChoiceColumn):
+    # Pilihan (saran AI) dipasang lewat set_choices setelah pra-pengambilan selesai
+    def validate(self):
+        return ColumnGenerator.validate(self)
+
+    def sample(self, n, rng):
+        if not len(self.choices):
+            return np.full(n, f"AI suggestions not pre-fetched for {self.name}", dtype=object)
+        return super().sample(n, rng)
+
+    def unique_capacity(self):
+        # Saran AI sering memuat duplikat; kekurangan nilai berbeda ditutup dengan sufiks " (n)" deterministik
+        return None if len(self.distinct_choices) else 0
+
+    @property
+    def arrow_dictionary(self):
+        # Nilai bersufiks tidak ada di kamus, jadi kolom unik ditulis sebagai string biasa
+        return super().arrow_dictionary and not self.unique
+
+    def permutation_size(self, num_rows):
+        return max(len(self.distinct_choices), num_rows)
+
+    def values_at(self, positions):
+        rounds, choice_positions = np.divmod(positions, len(self.distinct_choices))
+        values = self.distinct_choices[choice_positions]
+        return np.asarray([f"{value} ({r + 1})" if r else value for value, r in zip(values, rounds.tolist())], dtype=object)
+
+def parse_foreign_key_ref(col_def):
+    # Referensi 'Tabel.kolom' dari opsi "ref=Tabel.kolom,..." atau bagian opsi tanpa '=' ("Tabel.kolom,skew=1")
+    col_options_str = col_def.get('options', '') or ''
+    bare_parts = [part.strip() for part in col_options_str.split(',') if part.strip() and '=' not in part]
+    ref = parse_options_str(col_options_str).get('ref', bare_parts[0] if bare_parts else '')
+    table_name, _, col_name = str(ref).strip().rpartition('.')
+    return (table_name, col_name) if table_name and col_name else None
+
+class ForeignKeyColumn(ColumnGenerator):
+    # Nilai diambil dari array kunci tabel induk yang sudah digenerate (indeks ringkas di memori).
+    # Mode: acak (opsional skew Zipf), unik (satu-ke-satu), atau min/max_children per induk (satu-ke-banyak).
+    def __init__(self, col_def, table_name, options, parent_keys, key_seed=None, faker=None):
+        super().__init__(col_def, table_name, options, key_seed, faker)
+        self.skew = float(options.get('skew', 0) or 0)
+        self.min_children = options.get('min_children')
+        self.max_children = options.get('max_children')
+        self.has_cardinality = self.min_children is not None or self.max_children is not None
+        self.min_children = int(self.min_children or 0)
+        self.max_children = int(self.max_children) if self.max_children is not None else None
+        self.parent_cdf = None
+        self.slot_ends = None
+        self.parent_keys = None
+        if parent_keys is not None: self.bind_parent_keys(parent_keys)
+
+    def bind_parent_keys(self, parent_keys):
+        # Dipasang setelah tabel induk selesai digenerate
+        self.parent_keys = parent_keys
+        kind = parent_keys.dtype.kind
+        self.null_dtype = 'Int64' if kind in 'iu' else 'float64' if kind == 'f' else 'boolean' if kind == 'b' else object
+
+    def validate(self):
+        errors = super().validate()
+        if self.skew < 0: errors.append(f"{self.label} skew tidak boleh negatif.")
+        return errors
+
+    def unique_capacity(self):
+        return len(self.parent_keys)
+
+    def check_cardinality(self, parent_rows, num_rows):
+        # Dipakai saat validasi skema (sebelum induk digenerate) maupun saat prepare
+        label = self.label
+        if parent_rows == 0 and num_rows > 0:
+            return f"{label} mereferensikan tabel induk tanpa baris."
+        if self.unique and self.has_cardinality:
+            return f"{label} unik (satu-ke-satu) tidak bisa digabung dengan min_children/max_children."
+        if self.unique and parent_rows < num_rows:
+            return f"{label} unik hanya punya {parent_rows} kunci induk, tetapi diminta {num_rows} baris."
+        if self.has_cardinality:
+            max_children = self.max_children if self.max_children is not None else num_rows
+            if self.min_children < 0 or max_children < self.min_children:
+                return f"{label} membutuhkan 0 <= min_children <= max_children."
+            if not parent_rows * self.min_children <= num_rows <= parent_rows * max_children:
+                return (f"{label} dengan {self.min_children}-{max_children} anak per induk untuk {parent_rows} baris induk "
+                        f"membutuhkan {parent_rows * self.min_children}-{parent_rows * max_children} baris, tetapi diminta {num_rows}.")
+        return None
+
+    def _parent_weights(self, rng):
+        # Skew > 0: popularitas induk mengikuti Zipf (1/rank^skew) dengan urutan rank acak
+        n_parents = len(self.parent_keys)
+        if self.skew <= 0: return None
+        return (rng.permutation(n_parents) + 1.0) ** -self.skew
+
+    def _allocate_children(self, num_rows, weights, rng):
+        # Bagi num_rows slot anak ke tiap induk dalam rentang [min_children, max_children]
+        n_parents = len(self.parent_keys)
+        max_children = self.max_children if self.max_children is not None else num_rows
+        counts = np.full(n_parents, self.min_children, dtype=np.int64)
+        room = np.full(n_parents, max_children - self.min_children, dtype=np.int64)
+        weights = rng.random(n_parents) if weights is None else weights
+        remaining = num_rows - int(counts.sum())
+        while remaining > 0:
+            active = np.where(room > 0, weights, 0.0)
+            share = np.minimum(np.floor(remaining * active / active.sum()).astype(np.int64), room)
+            if not share.any():
+                share = np.zeros(n_parents, dtype=np.int64)
+                share[np.argsort(-active, kind='stable')[:remaining]] = 1
+            counts += share; room -= share
+            remaining -= int(share.sum())
+        return np.cumsum(counts)
+
+    def prepare(self, num_rows):
+        if self.parent_keys is None: return None # Probe validasi; dicek lewat check_cardinality
+        error = self.check_cardinality(len(self.parent_keys), num_rows)
+        if error or self.unique: return error or super().prepare(num_rows)
+        # Distribusi induk diturunkan dari key_seed -> sama untuk semua potongan/shard tabel
+        rng = np.random.default_rng(self.key_seed)
+        weights = self._parent_weights(rng)
+        if self.has_cardinality:
+            self.slot_ends = self._allocate_children(num_rows, weights, rng)
+            self.permutation = IndexPermutation(max(num_rows, 1), self.key_seed)
+        elif weights is not None:
+            self.parent_cdf = np.cumsum(weights / weights.sum())
+        return None
+
+    def sample(self, n, rng):
+        if self.parent_cdf is not None:
+            parents = np.minimum(np.searchsorted(self.parent_cdf, rng.random(n), side='right'), len(self.parent_keys) - 1)
+        else:
+            parents = rng.integers(0, len(self.parent_keys), n)
+        return self.parent_keys[parents]
+
+    def values_at(self, positions):
+        return self.parent_keys[positions]
+
+    def generate(self, n, rng, row_offset=0):
+        if self.slot_ends is None: return super().generate(n, rng, row_offset)
+        # Baris anak ke-i menempati slot perm(i); induk = rentang slot yang memuatnya.
+        # Baris null melewatkan slotnya sehingga induk bisa mendapat kurang dari min_children.
+        mask = self.null_mask(n, rng)
+        positions = np.arange(n) if mask is None else np.flatnonzero(~mask)
+        parents = np.searchsorted(self.slot_ends, self.permutation(positions + row_offset), side='right')
+        return self.assemble(self.parent_keys[parents], mask, n)
+
+class UnknownColumn(ColumnGenerator):
+    def validate(self):
+        return super().validate() + [f"{self.label}: tipe tidak dikenal."]
+
+    def permutation_size(self, num_rows):
+        return None
+
+    def sample(self, n, rng):
+        return np.full(n, f"Tipe tdk dikenal: {self.type}", dtype=object)
+
+    def sample_unique(self, indices, rng):
+        return self.sample(len(indices), rng)
+
+def compile_column(col_def, table_name, ai_suggestions_list=None, key_seed=None, faker=None, parent_keys=None):
+    col_type = col_def['type']
+    col_options_str = col_def.get('options', '') or ''
+    options = parse_options_str(col_options_str)
+    args = (col_def, table_name, options)
+    if col_type == 'string': return StringColumn(*args, key_seed, faker)
+    if col_type == 'text': return TextColumn(*args, key_seed, faker)
+    if col_type == 'integer': return IntegerColumn(*args, key_seed, faker)
+    if col_type == 'float': return FloatColumn(*args, key_seed, faker)
+    if col_type == 'date': return DateColumn(*args, key_seed, faker)
+    if col_type == 'email': return EmailColumn(*args, key_seed, faker)
+    if col_type == 'fullname': return FullNameColumn(*args, key_seed, faker)
+    if col_type == 'address': return AddressColumn(*args, key_seed, faker)
+    if col_type == 'uuid': return UUIDColumn(*args, key_seed, faker)
+    if col_type == 'boolean': return BooleanColumn(*args, key_seed, faker)
+    if col_type == 'custom_list':
+        return ChoiceColumn(*args, [i.strip() for i in col_options_str.split(',') if i.strip()], key_seed, faker)
+    if col_type == 'ai_text': return AITextColumn(*args, ai_suggestions_list or [], key_seed, faker)
+    if col_type == 'foreign_key': return ForeignKeyColumn(*args, parent_keys, key_seed, faker)
+    return UnknownColumn(*args, key_seed, faker)
+
+class SchemaValidationError(ValueError):
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+    def __reduce__(self):
+        return (SchemaValidationError, (self.errors,))
+
+def is_row_count(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+def is_column_definition(col_def):
+    return (isinstance(col_def, dict) and isinstance(col_def.get('name'), str) and bool(col_def['name'].strip())
+            and isinstance(col_def.get('type'), str) and isinstance(col_def.get('options', '') or '', str))
+
+def validate_schema_definition(schema):
+    # Validasi struktur JSON permintaan sebelum kompilasi; semua error dikumpulkan sekaligus
+    if not isinstance(schema, dict): return ["Body harus berupa skema JSON."]
+    errors = []
+    if not is_row_count(schema.get('num_rows', 10)): errors.append("num_rows harus bilangan bulat >= 0.")
+    tables_data = schema.get('tables', [])
+    if not isinstance(tables_data, list): return errors + ["tables harus berupa daftar."]
+    table_names = set()
+    for table_index, table_def in enumerate(tables_data):
+        if not isinstance(table_def, dict):
+            errors.append(f"Tabel ke-{table_index + 1} harus berupa objek."); continue
+        table_name = table_def.get('name', f'TabelTanpaNama_{table_index + 1}')
+        if not isinstance(table_name, str) or not table_name.strip():
+            errors.append(f"Nama tabel ke-{table_index + 1} harus berupa teks."); continue
+        if table_name in table_names: errors.append(f"Nama tabel '{table_name}' dipakai lebih dari sekali.")
+        table_names.add(table_name)
+        if table_def.get('num_rows') is not None and not is_row_count(table_def['num_rows']):
+            errors.append(f"num_rows tabel '{table_name}' harus bilangan bulat >= 0.")
+        columns_def = table_def.get('columns', [])
+        if not isinstance(columns_def, list):
+            errors.append(f"columns tabel '{table_name}' harus berupa daftar."); continue
+        col_names = set()
+        for col_index, col_def in enumerate(columns_def):
+            if not isinstance(col_def, dict) or not isinstance(col_def.get('name'), str) or not col_def['name'].strip():
+                errors.append(f"Kolom ke-{col_index + 1} tabel '{table_name}' harus punya 'name'."); continue
+            if not isinstance(col_def.get('type'), str):
+                errors.append(f"Kolom '{table_name}.{col_def['name']}' harus punya 'type'."); continue
+            if col_def['name'] in col_names: errors.append(f"Nama kolom '{table_name}.{col_def['name']}' dipakai lebih dari sekali.")
+            col_names.add(col_def['name'])
+            if not isinstance(col_def.get('options', '') or '', str): errors.append(f"Opsi kolom '{table_name}.{col_def['name']}' harus berupa teks.")
+    return errors
+
+def compile_table(table_name, columns_def, streams):
+    # Kompilasi sekali per permintaan: opsi diparse, pilihan dibekukan, ordinal tanggal dihitung di muka.
+    # Kolom yang gagal dikompilasi dilewati dan errornya dilaporkan.
+    column_generators, errors = [], []
+    for col_def in columns_def:
+        try:
+            gen = compile_column(col_def, table_name, key_seed=streams.key_seed(col_def['name']))
+        except (TypeError, ValueError) as e:
+            errors.append(f"Kolom '{table_name}.{col_def['name']}' (tipe: {col_def['type']}) punya opsi tidak valid: {e}.")
+            continue
+        gen_errors = gen.validate()
+        gen.valid = not gen_errors
+        errors.extend(gen_errors)
+        column_generators.append(gen)
+    return column_generators, errors
+
+def bind_table_inputs(column_generators, ai_suggestions, parent_keys):
+    # Pasang saran AI & kunci induk (tersedia setelah pra-pengambilan / tabel induk selesai) ke kolom terkompilasi
+    for gen in column_generators:
+        if isinstance(gen, AITextColumn) and gen.name in ai_suggestions: gen.set_choices(ai_suggestions[gen.name])
+        elif isinstance(gen, ForeignKeyColumn) and gen.name in parent_keys: gen.bind_parent_keys(parent_keys[gen.name])
+
+def validate_unique_columns(table_specs, compiled_tables):
+    # Dijalankan sebelum generasi apa pun: laporkan semua kolom unik yang mustahil dipenuhi
+    errors = []
+    for (_, _, num_rows), column_generators in zip(table_specs, compiled_tables):
+        # ai_text belum punya saran saat validasi; kekurangan nilai unik ditutup sufiks saat generasi.
+        # Kolom yang opsinya sudah ditolak validate() tidak diuji (opsinya bisa membuat prepare() gagal).
+        probes = [gen for gen in column_generators if gen.valid and not isinstance(gen, AITextColumn)]
+        errors.extend(prepare_table(probes, num_rows))
+    return errors
+
+def prepare_table(column_generators, num_rows):
+    # Validasi kapasitas kolom unik di muka & siapkan permutasinya; kembalikan semua error
+    return [error for error in (gen.prepare(num_rows) for gen in column_generators) if error]
+
+def has_ai_columns(columns_def):
+    return any(cd['type'] == 'ai_text' for cd in columns_def)
+
+def resolve_table_dependencies(table_specs, compiled_tables):
+    # Validasi referensi foreign_key & susun urutan generasi topologis (induk sebelum anak).
+    # Mengembalikan (urutan indeks tabel, {(indeks anak, kolom): (indeks induk, kolom induk)}, errors).
+    table_index_by_name = {}
+    for table_index, (table_name, _, _) in enumerate(table_specs): table_index_by_name.setdefault(table_name, table_index)
+    errors = []
+    foreign_keys = {}
+    parents = [set() for _ in table_specs]
+    for child_index, (table_name, columns_def, num_rows) in enumerate(table_specs):
+        for col_def in columns_def:
+            if col_def['type'] != 'foreign_key': continue
+            label = f"Kolom '{table_name}.{col_def['name']}' (tipe: foreign_key)"
+            ref = parse_foreign_key_ref(col_def)
+            if ref is None:
+                errors.append(f"{label} membutuhkan opsi ref=Tabel.kolom."); continue
+            parent_index = table_index_by_name.get(ref[0])
+            parent_col_def = None if parent_index is None else next((cd for cd in table_specs[parent_index][1] if cd['name'] == ref[1]), None)
+            if parent_col_def is None:
+                errors.append(f"{label} mereferensikan '{ref[0]}.{ref[1]}' yang tidak ada."); continue
+            if not parent_col_def.get('unique') or parent_col_def.get('nullable'):
+                errors.append(f"{label} mereferensikan '{ref[0]}.{ref[1]}' yang harus unik dan tidak nullable (kunci)."); continue
+            gen = next((gen for gen in compiled_tables[child_index] if gen.name == col_def['name']), None)
+            error = gen.check_cardinality(table_specs[parent_index][2], num_rows) if gen is not None else None
+            if error: errors.append(error)
+            foreign_keys[(child_index, col_def['name'])] = (parent_index, ref[1])
+            parents[child_index].add(parent_index)
+    # Kahn per gelombang; dalam satu gelombang tabel tanpa 'ai_text' didahulukan selagi saran AI diambil
+    order, done = [], set()
+    while len(order) < len(table_specs):
+        ready = [i for i in range(len(table_specs)) if i not in done and parents[i] <= done]
+        if not ready:
+            cycle = ", ".join(table_specs[i][0] for i in range(len(table_specs)) if i not in done)
+            errors.append(f"Foreign key membentuk siklus antar tabel: {cycle}.")
             break
-        tries += 1
-    if tries >= max_unique_tries and existing_values_set is not None:
-        print(f"Warning: Gagal menghasilkan nilai unik setelah {max_unique_tries} percobaan untuk kolom '{col_name}' (tipe: {col_type}). Nilai terakhir: '{val}'")
-    return val
+        ready.sort(key=lambda i: has_ai_columns(table_specs[i][1]))
+        order.extend(ready); done.update(ready)
+    return order, foreign_keys, errors
+
+def ai_suggestions_needed(col_def, num_rows):
+    # Kolom ai_text unik meminta saran 25% lebih banyak dari jumlah baris agar duplikat dari model bisa dibuang
+    # (dibatasi AI_MAX_SUGGESTIONS_PER_COLUMN; sisa kekurangan diberi sufiks oleh AITextColumn)
+    if col_def.get('unique'):
+        return min(max(NUM_AI_SUGGESTIONS_PER_COLUMN, num_rows + -(-num_rows // 4)), AI_MAX_SUGGESTIONS_PER_COLUMN)
+    return NUM_AI_SUGGESTIONS_PER_COLUMN
+
+def get_ai_user_hint(col_options_str):
+    options = parse_options_str(col_options_str)
+    return options.get('hint', col_options_str if '=' not in col_options_str and col_options_str else '')
+
+def prefetch_ai_suggestions(tables, database_context, model=None, executor=None, cache=None, pinned=False):
+    # Kirim permintaan saran untuk semua kolom 'ai_text' sekaligus; hasilnya berupa future per (tabel, kolom).
+    # tables berisi (nama tabel, definisi kolom, jumlah baris).
+    executor = executor or ai_prefetch_executor
+    futures = {}
+    for table_name, columns_def, num_rows in tables:
+        for col_def in columns_def:
+            if col_def['type'] != 'ai_text': continue
+            futures[(table_name, col_def['name'])] = executor.submit(
+                fetch_ai_suggestions_cached,
+                col_name=col_def['name'],
+                table_name=table_name,
+                database_context=database_context,
+                user_hint=get_ai_user_hint(col_def.get('options', '') or ''),
+                num_suggestions=ai_suggestions_needed(col_def, num_rows),
+                model=model,
+                cache=cache,
+                pinned=pinned,
+                max_tokens_multiplier=40 # Naikkan sedikit untuk jaga-jaga
+            )
+    return futures
+
+def stable_hash(text):
+    # Hash yang sama di setiap proses (hash() bawaan Python diacak per proses)
+    return zlib.crc32(str(text).encode('utf-8'))
+
+def normalize_seed(seed):
+    if seed is None or seed == '': return None
+    if isinstance(seed, bool): raise SchemaValidationError(["seed harus berupa bilangan bulat atau string."])
+    # Bilangan bulat non-negatif (atau string digit) dipakai langsung; selain itu (termasuk bilangan negatif)
+    # di-hash dari bentuk teksnya, sehingga -1 dan 1 menghasilkan data berbeda
+    if isinstance(seed, int): seed = str(seed)
+    if isinstance(seed, str):
+        return int(seed) if seed.isascii() and seed.isdigit() else int.from_bytes(hashlib.sha256(seed.encode('utf-8')).digest()[:8], 'big')
+    raise SchemaValidationError(["seed harus berupa bilangan bulat atau string."])
+
+class TableRandomStreams:
+    # Aliran RNG terpisah per (tabel, kolom, blok baris). Nilai sebuah blok hanya bergantung pada
+    # seed, nama tabel/kolom, dan indeks blok -> hasil identik berapa pun jumlah shard/proses.
+    def __init__(self, seed, table_name):
+        entropy = seed if seed is not None else np.random.SeedSequence().entropy
+        self.seed_sequence = np.random.SeedSequence(entropy, spawn_key=(stable_hash(table_name),))
+
+    def _sequence(self, col_name, *key):
+        return np.random.SeedSequence(self.seed_sequence.entropy, spawn_key=self.seed_sequence.spawn_key + (stable_hash(col_name),) + key)
+
+    def key_seed(self, col_name):
+        return int(self._sequence(col_name, 0).generate_state(1, np.uint64)[0])
+
+    def block(self, col_name, block_index):
+        sequence = self._sequence(col_name, 1, block_index)
+        return np.random.default_rng(sequence), int(sequence.generate_state(1)[0])
+
+# --- Instrumentasi ---
+# Waktu dinding per tahap (parse, ai_fetch, ai_wait, generate, frame, write, merge_shards, zip) dan penghitung
+# per tipe kolom. Shard mengisi StageProfile lokal yang ikut dikembalikan dari proses pool, lalu digabung ke
+# GenerationMetrics milik proses worker (dibaca lewat /metrics). Waktu tahap shard dijumlahkan lintas proses.
+
+class StageProfile:
+    def __init__(self):
+        self.stages = {} # tahap -> detik
+        self.column_types = {} # tipe kolom -> [jumlah nilai, detik]
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_column(self, col_type, values, seconds):
+        entry = self.column_types.setdefault(col_type, [0, 0.0])
+        entry[0] += values
+        entry[1] += seconds
+
+    @contextlib.contextmanager
+    def timed(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+class GenerationMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started_at = time.time()
+            self.counters = {}
+            self.stages = {} # tahap -> [jumlah observasi, total detik, maks detik]
+            self.column_types = {} # tipe kolom -> [jumlah nilai, detik]
+
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_stage(self, stage, seconds):
+        with self.lock:
+            self._add_stage(stage, seconds)
+
+    def _add_stage(self, stage, seconds):
+        entry = self.stages.setdefault(stage, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+    def record(self, profile):
+        with self.lock:
+            for stage, seconds in profile.stages.items(): self._add_stage(stage, seconds)
+            for col_type, (values, seconds) in profile.column_types.items():
+                entry = self.column_types.setdefault(col_type, [0, 0.0])
+                entry[0] += values
+                entry[1] += seconds
+
+    @contextlib.contextmanager
+    def timed(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - started)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "pid": os.getpid(), # Metrik per proses worker gunicorn
+                "uptime_seconds": round(time.time() - self.started_at, 1),
+                "generation_processes": GENERATION_PROCESSES,
+                "counters": dict(self.counters),
+                "stages": {stage: {"count": count, "total_seconds": round(total, 4), "mean_seconds": round(total / count, 4),
+                                   "max_seconds": round(longest, 4)}
+                           for stage, (count, total, longest) in self.stages.items()},
+                "column_types": {col_type: {"values": values, "seconds": round(seconds, 4),
+                                            "values_per_second": round(values / seconds, 1) if seconds > 0 else None}
+                                 for col_type, (values, seconds) in self.column_types.items()}
+            }
+
+generation_metrics = GenerationMetrics()
+
+def generate_table_frame(column_generators, num_rows, streams=None, row_offset=0, block_index=0, profile=None):
+    streams = streams or TableRandomStreams(None, '')
+    columns = {}
+    generate_started = time.perf_counter()
+    for gen in column_generators:
+        started = time.perf_counter()
+        rng, faker_seed = streams.block(gen.name, block_index)
+        gen.fake.seed_instance(faker_seed)
+        columns[gen.name] = gen.generate(num_rows, rng, row_offset)
+        if profile is not None: profile.add_column(gen.type, num_rows, time.perf_counter() - started)
+    if profile is None: return pd.DataFrame(columns)
+    profile.add('generate', time.perf_counter() - generate_started)
+    with profile.timed('frame'):
+        return pd.DataFrame(columns)
+
+def iter_table_chunks(column_generators, num_rows, chunk_size, streams=None, row_offset=0, profile=None):
+    # Generator potongan DataFrame berukuran tetap; tabel tidak pernah utuh di memori.
+    # Batas potongan selalu kelipatan chunk_size dari baris global sehingga indeks blok konsisten.
+    streams = streams or TableRandomStreams(None, '')
+    if num_rows <= 0:
+        yield generate_table_frame(column_generators, 0, streams, row_offset, row_offset // chunk_size, profile)
+        return
+    for start in range(0, num_rows, chunk_size):
+        yield generate_table_frame(column_generators, min(chunk_size, num_rows - start), streams,
+                                   row_offset + start, (row_offset + start) // chunk_size, profile)
+
+def write_csv_chunks(path, chunks, header=True, compression=None, block_members=False):
+    # path boleh berupa file-like biner (mis. entri zip streaming).
+    # Varian gzip/zstd dikompresi bertahap per potongan (tanpa file CSV sementara).
+    # Header gzip tanpa nama file & mtime agar output ber-seed tetap identik byte-per-byte.
+    # block_members (mode seed, potongan = DETERMINISTIC_BLOCK_ROWS): tiap potongan jadi anggota gzip/frame zstd
+    # tersendiri, sehingga shard yang disambung identik byte-per-byte dengan output satu proses.
+    with (open(path, 'wb') if isinstance(path, str) else path) as raw_f:
+        if compression is not None and block_members:
+            for i, chunk_df in enumerate(chunks):
+                data = chunk_df.to_csv(index=False, header=(header and i == 0)).encode('utf-8')
+                if compression == 'gzip': raw_f.write(gzip.compress(data, compresslevel=CSV_GZIP_LEVEL, mtime=0))
+                else: raw_f.write(pa.Codec('zstd').compress(data, asbytes=True))
+            return
+        if compression == 'gzip': stream = gzip.GzipFile(filename='', mode='wb', compresslevel=CSV_GZIP_LEVEL, fileobj=raw_f, mtime=0)
+        elif compression == 'zstd': stream = pa.CompressedOutputStream(raw_f, 'zstd')
+        else: stream = raw_f
+        with io.TextIOWrapper(stream, encoding='utf-8', newline='') as f:
+            for i, chunk_df in enumerate(chunks):
+                chunk_df.to_csv(f, index=False, header=(header and i == 0))
+
+def write_excel_chunks(path, chunks, column_names):
+    # Workbook write-only openpyxl menulis baris langsung ke file sementara, bukan ke memori
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet1')
+    header = []
+    for col_name in column_names:
+        cell = WriteOnlyCell(ws, value=col_name)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    ws.append(header)
+    for chunk_df in chunks:
+        chunk_df = chunk_df.astype(object).where(chunk_df.notna(), None)
+        for row in chunk_df.itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(path)
+
+def arrow_schema(column_generators):
+    # Kolom pilihan (custom_list/ai_text non-unik) memakai tipe dictionary dengan kamus tetap = distinct_choices,
+    # sehingga kamus sama di semua potongan/shard (syarat format file Arrow IPC) & dibaca sebagai kategori.
+    # Boolean tetap bool native (sudah 1 bit per nilai; dictionary justru lebih besar).
+    fields = []
+    for gen in column_generators:
+        if isinstance(gen, ChoiceColumn) and gen.arrow_dictionary: arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif gen.null_dtype == 'Int64': arrow_type = pa.int64()
+        elif gen.null_dtype == 'float64': arrow_type = pa.float64()
+        elif gen.null_dtype == 'boolean': arrow_type = pa.bool_()
+        else: arrow_type = pa.string()
+        fields.append(pa.field(gen.name, arrow_type))
+    return pa.schema(fields)
+
+def chunk_to_record_batch(chunk_df, column_generators, schema):
+    arrays = []
+    for gen, field in zip(column_generators, schema):
+        values = chunk_df[gen.name]
+        if pa.types.is_dictionary(field.type):
+            codes = pd.Categorical(values, categories=gen.distinct_choices).codes
+            outside = (codes < 0) & values.notna().to_numpy()
+            if outside.any():
+                # Jangan diam-diam menulis NULL untuk nilai yang tidak ada di kamus
+                raise ValueError(f"{gen.label} memuat nilai di luar kamus Arrow: {values[outside].iloc[0]!r}")
+            arrays.append(pa.DictionaryArray.from_arrays(pa.array(codes, mask=codes < 0), pa.array(gen.distinct_choices, pa.string())))
+        else:
+            arrays.append(pa.Array.from_pandas(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def open_arrow_writer(path, schema, requested_format):
+    if requested_format == 'parquet':
+        dictionary_columns = [field.name for field in schema if pa.types.is_dictionary(field.type)]
+        return pq.ParquetWriter(path, schema, compression=PARQUET_COMPRESSION, use_dictionary=dictionary_columns or False)
+    return pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression=ARROW_IPC_COMPRESSION))
+
+def write_arrow_chunks(path, chunks, column_generators, requested_format):
+    # Satu row group (Parquet) / record batch (Arrow IPC) per potongan; memori tetap terbatas
+    schema = arrow_schema(column_generators)
+    with open_arrow_writer(path, schema, requested_format) as writer:
+        for chunk_df in chunks:
+            writer.write_batch(chunk_to_record_batch(chunk_df, column_generators, schema))
+
+def write_table_chunks(path, chunks, column_generators, requested_format, header=True, block_members=False):
+    if requested_format == 'excel':
+        write_excel_chunks(path, chunks, [gen.name for gen in column_generators])
+    elif requested_format in ('parquet', 'arrow'):
+        write_arrow_chunks(path, chunks, column_generators, requested_format)
+    elif requested_format in DATABASE_FORMATS:
+        path.insert_chunks(chunks) # path berupa DatabaseTableWriter
+    else:
+        write_csv_chunks(path, chunks, header, {'csv_gzip': 'gzip', 'csv_zstd': 'zstd'}.get(requested_format), block_members)
+
+# --- Target database ---
+# Tabel dibuat dari tipe kolom, diisi per potongan dengan executemany dalam satu transaksi per tabel,
+# lalu constraint unik, foreign key, & indeks dibangun SETELAH data masuk (jauh lebih cepat daripada
+# memelihara indeks per baris). Dialek 'sqlite' memakai indeks unik & REFERENCES inline (SQLite tidak
+# mendukung ALTER TABLE ADD CONSTRAINT); dialek 'standard' memakai ALTER TABLE ... ADD CONSTRAINT.
+
+class DatabaseTarget:
+    def __init__(self, name, module_name, connect_kwargs, dialect=None):
+        self.name = name
+        self.module_name = module_name
+        self.connect_kwargs = connect_kwargs
+        self.dialect = dialect or ('sqlite' if module_name == 'sqlite3' else 'standard')
+        if self.dialect not in DATABASE_DIALECTS:
+            raise ValueError(f"dialect harus salah satu dari: {', '.join(DATABASE_DIALECTS)}")
+        if module_name == 'sqlite3' and self.dialect != 'sqlite':
+            raise ValueError("modul sqlite3 hanya mendukung dialect 'sqlite' (SQLite tidak punya ALTER TABLE ... ADD CONSTRAINT)")
+
+    def connect(self):
+        module = importlib.import_module(self.module_name)
+        return module.connect(**self.connect_kwargs), getattr(module, 'paramstyle', 'qmark')
+
+def load_database_targets(targets_json):
+    # Target yang tidak valid dilewati (dengan pesan) agar target lain tetap bisa dipakai
+    targets = {}
+    try:
+        specs = json.loads(targets_json).items()
+    except (ValueError, AttributeError) as e:
+        print(f"Error saat membaca DATABASE_TARGETS: {e}")
+        return targets
+    for name, spec in specs:
+        try:
+            targets[name] = DatabaseTarget(name, spec['module'], spec.get('connect', {}), spec.get('dialect'))
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            print(f"Error pada target database '{name}' di DATABASE_TARGETS: {e}")
+    return targets
+
+database_targets = load_database_targets(DATABASE_TARGETS_JSON)
+
+def quote_identifier(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+def sql_placeholder(paramstyle, position):
+    if paramstyle == 'qmark': return '?'
+    if paramstyle == 'numeric': return f":{position + 1}"
+    if paramstyle == 'named': return f":p{position}"
+    return '%s' # format & pyformat
+
+def column_sql_type(gen):
+    if isinstance(gen, DateColumn): return 'DATE'
+    return SQL_TYPES.get(gen.null_dtype, 'TEXT')
+
+def constraint_name(prefix, table_name, col_name):
+    return quote_identifier(f"{prefix}_{table_name}_{col_name}")
+
+def create_table_sql(table_name, column_generators, foreign_refs, dialect):
+    # foreign_refs: kolom -> (nama tabel induk, generator kolom induk)
+    definitions = []
+    for gen in column_generators:
+        parent_ref = foreign_refs.get(gen.name)
+        definition = f"{quote_identifier(gen.name)} {column_sql_type(parent_ref[1] if parent_ref else gen)}"
+        if not gen.nullable: definition += " NOT NULL"
+        if parent_ref and dialect == 'sqlite':
+            definition += f" REFERENCES {quote_identifier(parent_ref[0])} ({quote_identifier(parent_ref[1].name)})"
+        definitions.append(definition)
+    return f"CREATE TABLE {quote_identifier(table_name)} ({', '.join(definitions)})"
+
+def post_load_sql(table_name, column_generators, foreign_refs, dialect):
+    # (constraint unik, lalu foreign key & indeksnya); dijalankan setelah SEMUA tabel terisi
+    unique_statements, foreign_statements = [], []
+    table = quote_identifier(table_name)
+    for gen in column_generators:
+        column = quote_identifier(gen.name)
+        if gen.unique:
+            if dialect == 'sqlite': unique_statements.append(f"CREATE UNIQUE INDEX {constraint_name('uq', table_name, gen.name)} ON {table} ({column})")
+            else: unique_statements.append(f"ALTER TABLE {table} ADD CONSTRAINT {constraint_name('uq', table_name, gen.name)} UNIQUE ({column})")
+        parent_ref = foreign_refs.get(gen.name)
+        if parent_ref is None: continue
+        if dialect != 'sqlite':
+            foreign_statements.append(f"ALTER TABLE {table} ADD CONSTRAINT {constraint_name('fk', table_name, gen.name)} FOREIGN KEY ({column}) "
+                                      f"REFERENCES {quote_identifier(parent_ref[0])} ({quote_identifier(parent_ref[1].name)})")
+        if not gen.unique: foreign_statements.append(f"CREATE INDEX {constraint_name('ix', table_name, gen.name)} ON {table} ({column})")
+    return unique_statements, foreign_statements
+
+class DatabaseTableWriter:
+    # Tujuan tulis untuk write_table_chunks: setiap potongan disisipkan dengan satu executemany
+    def __init__(self, cursor, table_name, column_generators, paramstyle):
+        columns = ", ".join(quote_identifier(gen.name) for gen in column_generators)
+        placeholders = ", ".join(sql_placeholder(paramstyle, i) for i in range(len(column_generators)))
+        self.sql = f"INSERT INTO {quote_identifier(table_name)} ({columns}) VALUES ({placeholders})"
+        self.cursor = cursor
+        self.named = paramstyle == 'named'
+
+    def insert_chunks(self, chunks):
+        for chunk_df in chunks:
+            # Nilai Python native dengan None untuk null (pd.NA/NaN tidak dikenali driver DB-API)
+            rows = chunk_df.astype(object).where(chunk_df.notna(), None).itertuples(index=False, name=None)
+            if self.named: rows = ({f"p{i}": value for i, value in enumerate(row)} for row in rows)
+            self.cursor.executemany(self.sql, list(rows))
+
+def table_output_file(table_name, requested_format):
+    safe_table_name = "".join(c if c.isalnum() or c in ('_','-') else '_' for c in table_name)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+    extension = OUTPUT_FORMATS[requested_format][0]
+    actual_filename = f"{safe_table_name}_{timestamp}.{extension}"
+    return actual_filename, os.path.join(OUTPUT_DIR, actual_filename), f"{safe_table_name}.{extension}"
+
+# --- Penjadwal generasi paralel (multi-proses) ---
+# Tabel independen dan potongan rentang baris (shard) dari tabel besar dikerjakan di process pool.
+# Shard memakai kunci permutasi unik yang sama (ruang nilai dipartisi per indeks baris global)
+# dan seed turunan per shard; file bagian kemudian disambung langsung ke file output.
+
+_generation_pool = None
+_generation_pool_lock = threading.Lock()
+
+def get_generation_pool():
+    global _generation_pool
+    with _generation_pool_lock:
+        if _generation_pool is None:
+            _generation_pool = ProcessPoolExecutor(max_workers=GENERATION_PROCESSES,
+                                                   mp_context=multiprocessing.get_context(GENERATION_MP_START_METHOD))
+        return _generation_pool
+
+def plan_table_shards(num_rows, chunk_size, shardable):
+    # Batas shard selalu kelipatan chunk_size agar pemotongan sama dengan mode satu proses
+    if not shardable or GENERATION_PROCESSES <= 1 or num_rows < 2 * PARALLEL_MIN_ROWS:
+        return [(0, num_rows)]
+    n_shards = min(GENERATION_PROCESSES, num_rows // PARALLEL_MIN_ROWS)
+    shard_rows = -(-num_rows // n_shards)
+    shard_rows = -(-shard_rows // chunk_size) * chunk_size
+    return [(start, min(start + shard_rows, num_rows)) for start in range(0, num_rows, shard_rows)]
+
+def build_shard_tasks(table_name, column_generators, streams, num_rows, chunk_size, requested_format, output_path,
+                      collect_keys=(), allow_sharding=True, block_members=False):
+    # Kolom unik berbasis himpunan (tipe Faker) tidak bisa dijamin unik lintas shard
+    shardable = allow_sharding and requested_format != 'excel' and all(gen.shard_safe for gen in column_generators)
+    shards = plan_table_shards(num_rows, chunk_size, shardable)
+    tasks = []
+    for shard_index, (row_start, row_end) in enumerate(shards):
+        tasks.append({
+            "table_name": table_name,
+            "column_generators": column_generators, # kolom terkompilasi (saran AI & kunci induk sudah terpasang)
+            "collect_keys": list(collect_keys), # kolom tabel ini yang direferensikan tabel lain
+            "num_rows": num_rows,
+            "row_start": row_start,
+            "row_end": row_end,
+            "chunk_size": chunk_size,
+            "streams": streams,
+            "format": requested_format,
+            "header": shard_index == 0,
+            "block_members": block_members, # mode seed: satu anggota gzip/frame zstd per potongan
+            "path": output_path if len(shards) == 1 else f"{output_path}.part{shard_index}",
+            "progress": None, # dict (atau proxy Manager) "tabel:shard" -> baris selesai
+            "progress_key": None,
+            "cancel": None # Event (atau proxy Manager) untuk pembatalan job
+        })
+    return tasks
+
+def run_generation_shard(task):
+    # Setiap shard punya instans Faker sendiri agar seed per blok tidak saling ganggu antar thread
+    streams = task['streams']
+    profile = StageProfile()
+    shard_started = time.perf_counter()
+    shard_faker = Faker(FAKER_LOCALE)
+    column_generators = [gen.for_shard(shard_faker) for gen in task['column_generators']]
+    with profile.timed('prepare'):
+        errors = prepare_table(column_generators, task['num_rows'])
+    if errors: raise SchemaValidationError(errors)
+    chunks = iter_table_chunks(column_generators, task['row_end'] - task['row_start'], task['chunk_size'], streams, task['row_start'], profile)
+    chunks = track_chunks(chunks, task['progress'], task['progress_key'], task['cancel'])
+    collected = {col_name: [] for col_name in task['collect_keys']}
+    if collected: chunks = collect_key_columns(chunks, collected)
+    write_started = time.perf_counter()
+    generated_before = profile.stages.get('generate', 0.0) + profile.stages.get('frame', 0.0)
+    write_table_chunks(task['path'], chunks, column_generators, task['format'], header=task['header'], block_members=task['block_members'])
+    # Potongan dihasilkan secara malas di dalam penulis; sisanya adalah serialisasi & penulisan
+    generated = profile.stages.get('generate', 0.0) + profile.stages.get('frame', 0.0) - generated_before
+    profile.add('write', time.perf_counter() - write_started - generated)
+    profile.add('shard_total', time.perf_counter() - shard_started)
+    return {"rows": task['row_end'] - task['row_start'], "profile": profile,
+            "keys": {col_name: np.concatenate(parts) if parts else np.empty(0, dtype=object) for col_name, parts in collected.items()}}
+
+def collect_key_columns(chunks, collected):
+    # Simpan nilai kolom kunci (yang direferensikan foreign_key) dari tiap potongan yang ditulis
+    for chunk_df in chunks:
+        for col_name, parts in collected.items(): parts.append(chunk_df[col_name].to_numpy())
+        yield chunk_df
+
+class GenerationCancelled(Exception):
+    pass
+
+class AISuggestionError(RuntimeError):
+    # Layanan AI gagal/tidak tersedia untuk kolom yang membutuhkan sarannya (bukan kesalahan input pengguna)
+    pass
+
+def track_chunks(chunks, progress, progress_key, cancel):
+    # Laporkan baris yang sudah ditulis setelah tiap potongan & hentikan jika job dibatalkan
+    rows_done = 0
+    for chunk_df in chunks:
+        if cancel is not None and cancel.is_set(): raise GenerationCancelled()
+        yield chunk_df
+        rows_done += len(chunk_df)
+        if progress is not None: progress[progress_key] = rows_done
+
+def discard_shard_outputs(tasks):
+    for task in tasks:
+        for path in {task['path'], task['path'].rsplit('.part', 1)[0]}:
+            if os.path.exists(path): os.remove(path)
+
+def run_inline(fn, *args):
+    future = Future()
+    try: future.set_result(fn(*args))
+    except Exception as e: future.set_exception(e)
+    return future
+
+def concatenate_shard_files(output_path, tasks):
+    # CSV (juga gzip/zstd: anggota/frame bersambung tetap valid) disambung byte-per-byte;
+    # Parquet/Arrow IPC disalin per row group/record batch ke satu file.
+    if len(tasks) == 1: return
+    if tasks[0]['format'] in ('parquet', 'arrow'):
+        merge_arrow_shard_files(output_path, tasks)
+        return
+    with open(output_path, 'wb') as out_f:
+        for task in tasks:
+            with open(task['path'], 'rb') as part_f:
+                shutil.copyfileobj(part_f, out_f, 1024 * 1024)
+            os.remove(task['path'])
+
+def merge_arrow_shard_files(output_path, tasks):
+    requested_format = tasks[0]['format']
+    writer = None
+    try:
+        for task in tasks:
+            if requested_format == 'parquet':
+                part = pq.ParquetFile(task['path'])
+                batches = (part.read_row_group(i) for i in range(part.num_row_groups))
+                schema = part.schema_arrow
+            else:
+                part = pa.ipc.open_file(pa.memory_map(task['path']))
+                batches = (part.get_batch(i) for i in range(part.num_record_batches))
+                schema = part.schema
+            if writer is None: writer = open_arrow_writer(output_path, schema, requested_format)
+            for batch in batches:
+                if requested_format == 'parquet': writer.write_table(batch)
+                else: writer.write_batch(batch)
+            os.remove(task['path'])
+    finally:
+        if writer is not None: writer.close()
 
 @app.route('/')
 def index(): return send_from_directory(BASE_DIR, 'index.html')
@@ -215,21 +1768,22 @@ def suggest_schema_ai_route():
         2.  RANCANG TABEL-TABEL yang diperlukan. Setiap tabel harus mewakili satu entitas atau konsep utama.
         3.  TENTUKAN KOLOM-KOLOM untuk setiap tabel. Kolom harus mencerminkan atribut-atribut penting dari entitas tabel tersebut.
             - Gunakan NAMA TABEL dan NAMA KOLOM yang jelas, deskriptif dalam Bahasa Indonesia (jika konteksnya Bahasa Indonesia), dan mengikuti konvensi penamaan yang baik (misalnya, PascalCase untuk Tabel, snake_case untuk kolom). Hindari singkatan yang ambigu.
-            - Untuk setiap kolom, pilih TIPE DATA yang paling sesuai dan efisien dari daftar berikut: [String, Integer, Float, Date, Email, FullName, Address, UUID, Boolean, Text, ai_text, Custom_List].
+            - Untuk setiap kolom, pilih TIPE DATA yang paling sesuai dan efisien dari daftar berikut: [String, Integer, Float, Date, Email, FullName, Address, UUID, Boolean, Text, ai_text, Custom_List, foreign_key].
             - Tentukan apakah sebuah kolom nilainya harus 'unique' (unik).
             - Tentukan apakah sebuah kolom 'nullable' (boleh kosong) dan berapa 'nullable_chance' (0-100%) jika boleh kosong.
             - Sertakan 'options' yang relevan (misalnya untuk String: min_len=X,max_len=Y; Integer/Float: min=A,max=B; Date: start=YYYY-MM-DD,end=YYYY-MM-DD; ai_text: hint=PetunjukTambahan; Custom_List: item1,item2,item3). Untuk ai_text, jika ada petunjuk spesifik untuk generasi konten, letakkan di 'options' sebagai 'hint=isi_petunjuk'.
+            - Hubungkan tabel yang saling berelasi dengan kolom bertipe foreign_key, options: ref=NamaTabel.nama_kolom (kolom yang direferensikan harus unique dan tidak nullable). Untuk relasi satu-ke-banyak boleh tambahkan min_children=X,max_children=Y, dan 'num_rows' pada tabel anak agar jumlah barisnya sesuai.
         4.  BAYANGKAN KUALITAS HASIL: Pikirkan tentang bagaimana Anda akan menyajikan contoh tabel dengan data jika diminta langsung oleh pengguna. Skema yang Anda rancang harus mencerminkan tingkat detail dan relevansi yang sama.
 
         PERSYARATAN OUTPUT JSON (SANGAT PENTING):
-        Format HANYA sebagai objek JSON yang valid. Root: {{ "tables": [ {{ "name": "NamaTabel", "columns": [{{ "name": "nama_kolom", "type": "TipeData", "options": "opsi_kolom_jika_ada", "unique": false, "nullable": false, "nullable_chance": 0 }}] }} ] }}
+        Format HANYA sebagai objek JSON yang valid. Root: {{ "tables": [ {{ "name": "NamaTabel", "num_rows": null, "columns": [{{ "name": "nama_kolom", "type": "TipeData", "options": "opsi_kolom_jika_ada", "unique": false, "nullable": false, "nullable_chance": 0 }}] }} ] }}
         Pastikan nama tabel dan kolom sesuai konvensi (PascalCase untuk Tabel, snake_case untuk kolom).
-        Contoh opsi: "min_len=5,max_len=10" untuk String, "hint=Buat deskripsi produk makanan ringan" untuk ai_text, "aktif,tidak aktif,pending" untuk Custom_List.
+        Contoh opsi: "min_len=5,max_len=10" untuk String, "hint=Buat deskripsi produk makanan ringan" untuk ai_text, "aktif,tidak aktif,pending" untuk Custom_List, "ref=Pelanggan.id_pelanggan,min_children=0,max_children=10" untuk foreign_key.
 
         Sekarang, berdasarkan konteks pengguna: "{user_context}", berikan rancangan skema database dalam format JSON yang diminta.
         """
         generation_config = genai.types.GenerationConfig(temperature=0.1, response_mime_type="application/json")
-        response = gemini_model_instance.generate_content(prompt, generation_config=generation_config)
+        response = generate_content_with_retry(gemini_model_instance, prompt, generation_config, "saran skema")
         
         cleaned_response_text = response.text.strip()
         # Pembersihan tambahan jika mime type tidak sepenuhnya menangani ```json
@@ -248,170 +1802,847 @@ def suggest_schema_ai_route():
         print(traceback.format_exc())
         return jsonify({"error": f"Error saat menyarankan skema AI: {str(e)}"}), 500
 
-@app.route('/generate-data', methods=['POST'])
-def handle_generate_data():
+# --- Job generasi asinkron ---
+# Status job disimpan di SQLite sehingga endpoint status/cancel bisa dilayani worker gunicorn mana pun.
+# Job dijalankan oleh thread pool lokal (tanpa broker eksternal) dan tetap berjalan walau klien terputus.
+
+_job_manager = None
+
+def get_job_manager():
+    # Manager menyediakan dict/Event yang bisa dibagi dengan proses di generation pool
+    global _job_manager
+    with _generation_pool_lock:
+        if _job_manager is None:
+            _job_manager = multiprocessing.get_context(GENERATION_MP_START_METHOD).Manager()
+        return _job_manager
+
+class GenerationTracker:
+    def __init__(self, shard_progress, cancel_event):
+        self.shard_progress = shard_progress
+        self.cancel_event = cancel_event
+        self.tables = {}
+        self.started_at = time.time()
+
+    @classmethod
+    def create(cls):
+        if GENERATION_PROCESSES > 1:
+            manager = get_job_manager()
+            return cls(manager.dict(), manager.Event())
+        return cls({}, threading.Event())
+
+    def register_table(self, table_index, table_name, rows_total):
+        self.tables[table_index] = (table_name, rows_total)
+
+    def attach(self, table_index, tasks):
+        for shard_index, task in enumerate(tasks):
+            task.update(progress=self.shard_progress, progress_key=f"{table_index}:{shard_index}", cancel=self.cancel_event)
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set(): raise GenerationCancelled()
+
+    def snapshot(self):
+        rows_by_table = {}
+        for key, rows in dict(self.shard_progress).items():
+            table_index = int(key.split(':', 1)[0])
+            rows_by_table[table_index] = rows_by_table.get(table_index, 0) + rows
+        tables = [{"table_name": name, "rows_done": rows_by_table.get(i, 0), "rows_total": total}
+                  for i, (name, total) in sorted(self.tables.items())]
+        rows_done = sum(t['rows_done'] for t in tables)
+        rows_total = sum(t['rows_total'] for t in tables)
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        throughput = rows_done / elapsed
+        return {
+            "tables": tables,
+            "rows_done": rows_done,
+            "rows_total": rows_total,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(throughput, 1),
+            "eta_seconds": round((rows_total - rows_done) / throughput, 1) if throughput > 0 else None
+        }
+
+class JobStore:
+    JSON_FIELDS = ('progress', 'result')
+
+    def __init__(self, path, retention_seconds):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL, started_at REAL, finished_at REAL, progress TEXT, result TEXT, error TEXT, cancel_requested INTEGER NOT NULL DEFAULT 0, pid INTEGER, heartbeat_at REAL)")
+            # Basis data dari versi sebelum ada kolom pemilik/heartbeat
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, sql_type in (('pid', 'INTEGER'), ('heartbeat_at', 'REAL')):
+                if column not in existing: conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {sql_type}")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def create(self, job_id):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (now - self.retention_seconds,))
+            conn.execute("INSERT INTO jobs (id, status, created_at, pid, heartbeat_at) VALUES (?, 'queued', ?, ?, ?)", (job_id, now, os.getpid(), now))
+
+    def heartbeat(self, pid):
+        # Dipanggil berkala oleh worker pemilik agar job antreannya (yang belum punya thread monitor) tidak dianggap mati
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE pid = ? AND status IN ('queued', 'running')", (time.time(), pid))
+
+    def _fail_if_stale(self, conn, job_id):
+        now = time.time()
+        conn.execute("UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE id = ? AND status IN ('queued', 'running') "
+                     "AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                     (now, "Worker yang menjalankan job berhenti (heartbeat tidak diperbarui). Silakan kirim ulang job.", job_id, now - JOB_HEARTBEAT_TIMEOUT))
+
+    def update(self, job_id, **fields):
+        for name in self.JSON_FIELDS:
+            if name in fields: fields[name] = json.dumps(fields[name], ensure_ascii=False)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            self._fail_if_stale(conn, job_id)
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None: return None
+        job = dict(row)
+        for name in self.JSON_FIELDS:
+            job[name] = json.loads(job[name]) if job[name] else None
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    def request_cancel(self, job_id):
+        with self._connect() as conn:
+            self._fail_if_stale(conn, job_id)
+            return conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')", (job_id,)).rowcount > 0
+
+    def is_cancel_requested(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+job_store = JobStore(JOBS_DB_PATH, JOB_RETENTION_SECONDS) if IS_MAIN_PROCESS else None
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='generation-job')
+_job_heartbeat_pid = None
+_job_heartbeat_lock = threading.Lock()
+
+def job_heartbeat_loop(pid):
+    while True:
+        try: job_store.heartbeat(pid)
+        except Exception as e: print(f"Error saat memperbarui heartbeat job: {e}")
+        time.sleep(JOB_HEARTBEAT_TIMEOUT / 4)
+
+def ensure_job_heartbeat():
+    # Dimulai saat job pertama diterima (bukan saat import) agar tetap jalan di worker hasil fork (gunicorn --preload)
+    global _job_heartbeat_pid
+    with _job_heartbeat_lock:
+        if _job_heartbeat_pid == os.getpid(): return
+        _job_heartbeat_pid = os.getpid()
+        threading.Thread(target=job_heartbeat_loop, args=(_job_heartbeat_pid,), name='job-heartbeat', daemon=True).start()
+
+def run_generation_job(job_id, schema):
+    if job_store.is_cancel_requested(job_id):
+        job_store.update(job_id, status='cancelled', finished_at=time.time())
+        return
+    tracker = GenerationTracker.create()
+    job_store.update(job_id, status='running', started_at=time.time(), pid=os.getpid(), heartbeat_at=time.time())
+    stop_monitor = threading.Event()
+
+    def monitor():
+        while not stop_monitor.wait(JOB_PROGRESS_INTERVAL):
+            job_store.update(job_id, progress=tracker.snapshot(), pid=os.getpid(), heartbeat_at=time.time())
+            if job_store.is_cancel_requested(job_id): tracker.cancel_event.set()
+
+    threading.Thread(target=monitor, name=f"job-monitor-{job_id[:8]}", daemon=True).start()
     try:
-        schema = request.json
-        num_rows = schema.get('num_rows', 10)
-        tables_data = schema.get('tables', [])
-        schema_database_context = schema.get('database_context', "data umum")
-        requested_format = schema.get('requested_format', 'csv').lower()
+        with generation_metrics.timed('job_total'):
+            payload = run_generation(schema, tracker)
+        job_store.update(job_id, status='completed', result=payload, progress=tracker.snapshot(), finished_at=time.time())
+    except GenerationCancelled:
+        print(f"Job {job_id} dibatalkan.")
+        job_store.update(job_id, status='cancelled', progress=tracker.snapshot(), finished_at=time.time())
+    except SchemaValidationError as e:
+        job_store.update(job_id, status='failed', error=f"Skema tidak valid: {str(e)}", result={"details": e.errors}, finished_at=time.time())
+    except AISuggestionError as e:
+        job_store.update(job_id, status='failed', error=f"Saran AI tidak tersedia: {str(e)}", finished_at=time.time())
+    except Exception as e:
+        import traceback
+        print(f"Error saat menjalankan job {job_id}: {traceback.format_exc()}")
+        job_store.update(job_id, status='failed', error=f"Kesalahan server internal: {str(e)}. Detail ada di log.", finished_at=time.time())
+    finally:
+        stop_monitor.set()
 
-        if requested_format not in ['csv', 'excel']:
-            requested_format = 'csv'
+# --- Siklus hidup file output ---
+# Setiap artefak (file tabel tunggal atau zip) dicatat di indeks SQLite yang dibagi antar worker.
+# Thread latar belakang menghapus artefak kedaluwarsa, menggusur yang paling lama tidak diakses saat kuota
+# terlampaui, dan membersihkan file yatim (sisa job gagal/dibatalkan). Permintaan ber-seed yang identik
+# memakai ulang artefak yang sama lewat kunci konten.
 
-        if not tables_data: return jsonify({"error": "Tidak ada definisi tabel."}), 400
+class OutputStore:
+    # Nama file yang dibuat generator: <tabel>_<timestamp 20 digit>.<ekstensi>, dbgenie_export_*, plus sufiks .partN shard.
+    # Hanya file seperti ini yang dihitung/dibersihkan, karena OUTPUT_DIR bisa diarahkan ke direktori yang dipakai bersama.
+    generated_name = re.compile(r"^(?:dbgenie_export_.+|.+_\d{20}\.(?:%s))(?:\.part\d+)?$"
+                                % "|".join(re.escape(extension) for extension, _ in OUTPUT_FORMATS.values()))
 
-        processed_files_details = []
-        
-        # BARU: Cache untuk menyimpan saran AI per kolom
-        ai_suggestions_cache = {}
-
-        # --- TAHAP 1: Pra-pengambilan Saran AI untuk kolom 'ai_text' ---
-        if gemini_model_instance: # Hanya lakukan jika AI aktif
-            print(f"\n--- Mengumpulkan saran AI (jika ada kolom 'ai_text', {NUM_AI_SUGGESTIONS_PER_COLUMN} saran per kolom) ---")
-            for table_def_for_ai_prefetch in tables_data:
-                table_name_for_prefetch = table_def_for_ai_prefetch.get('name', f'TabelTanpaNama_{random.randint(1000,9999)}')
-                columns_def_for_prefetch = table_def_for_ai_prefetch.get('columns', [])
-                for col_def_prefetch in columns_def_for_prefetch:
-                    if col_def_prefetch['type'] == 'ai_text':
-                        col_name_prefetch = col_def_prefetch['name']
-                        cache_key = (table_name_for_prefetch, col_name_prefetch)
-                        
-                        # Dapatkan user_hint dari options
-                        col_options_str = col_def_prefetch.get('options', '')
-                        options = parse_options_str(col_options_str)
-                        user_hint = options.get('hint', col_options_str if '=' not in col_options_str and col_options_str else '')
-
-                        # Panggil Gemini untuk mendapatkan daftar saran
-                        # Max_tokens_multiplier bisa disesuaikan jika saran sering terpotong
-                        suggestions = generate_ai_suggestions_list(
-                            col_name=col_name_prefetch,
-                            table_name=table_name_for_prefetch,
-                            database_context=schema_database_context,
-                            user_hint=user_hint,
-                            num_suggestions=NUM_AI_SUGGESTIONS_PER_COLUMN,
-                            max_tokens_multiplier=40 # Naikkan sedikit untuk jaga-jaga
-                        )
-                        ai_suggestions_cache[cache_key] = suggestions
-                        if not suggestions:
-                             print(f"  Peringatan: Tidak ada saran AI yang didapatkan untuk {table_name_for_prefetch}.{col_name_prefetch}")
-                        time.sleep(1) # Small delay to avoid hitting API rate limits if many ai_text columns
-        else:
-            print("\n--- Model AI tidak aktif, melewati pengumpulan saran AI ---")
-
-        # --- TAHAP 2: Generasi Data Aktual ---
-        for table_def in tables_data:
-            table_name = table_def.get('name', f'TabelTanpaNama_{random.randint(1000,9999)}')
-            columns_def = table_def.get('columns', [])
-            if not columns_def: continue
-            
-            data_rows = []
-            unique_sets = { cd['name']: set() for cd in columns_def if cd.get('unique') }
-            
-            print(f"\n--- Menghasilkan data untuk tabel: {table_name} ({num_rows} baris) ---")
-            for i_row in range(num_rows):
-                # Logika log progres
-                contains_ai_text_in_current_table = any(col['type'] == 'ai_text' for col in columns_def)
-                # Jika ada ai_text (bahkan jika dari cache), log lebih sering karena bisa jadi lebih lambat jika cache miss & fallback
-                log_freq = 1 if contains_ai_text_in_current_table and num_rows <= 20 else \
-                           (5 if contains_ai_text_in_current_table else 10) 
-                if num_rows <= log_freq or (i_row + 1) % log_freq == 0 or i_row == 0 :
-                    print(f"  Memproses baris {i_row + 1}/{num_rows}...")
-
-                row = {}
-                for col_def in columns_def:
-                    col_name = col_def['name']
-                    col_type = col_def['type']
-                    
-                    current_ai_suggestions = []
-                    if col_type == 'ai_text':
-                        cache_key = (table_name, col_name)
-                        current_ai_suggestions = ai_suggestions_cache.get(cache_key, []) # Ambil dari cache
-                        if not current_ai_suggestions and gemini_model_instance: # Jika cache kosong & AI aktif (seharusnya tidak terjadi)
-                            print(f"  Peringatan: Cache AI kosong untuk {table_name}.{col_name} saat generasi baris. Ini tidak diharapkan.")
-                    
-                    row[col_name] = generate_value(
-                        col_name, table_name, col_type, 
-                        col_def.get('options',''), schema_database_context,
-                        unique_sets.get(col_name) if col_def.get('unique') else None,
-                        col_def.get('nullable',False), int(col_def.get('nullable_chance',0)),
-                        ai_suggestions_list=current_ai_suggestions # Teruskan daftar saran
-                    )
-                data_rows.append(row)
-            
-            df = pd.DataFrame(data_rows) if data_rows else pd.DataFrame(columns=[cd['name'] for cd in columns_def])
-
-            safe_table_name = "".join(c if c.isalnum() or c in ('_','-') else '_' for c in table_name)
-            timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
-            
-            actual_filename = ""
-            file_path_for_zip = ""
-            file_url_for_download = ""
-
-            if requested_format == 'csv':
-                actual_filename = f"{safe_table_name}_{timestamp}.csv"
-                file_path_for_zip = os.path.join(OUTPUT_DIR, actual_filename)
-                df.to_csv(file_path_for_zip, index=False)
-            elif requested_format == 'excel':
-                actual_filename = f"{safe_table_name}_{timestamp}.xlsx"
-                file_path_for_zip = os.path.join(OUTPUT_DIR, actual_filename)
-                df.to_excel(file_path_for_zip, index=False, engine='openpyxl')
-            
-            file_url_for_download = f"/download/{actual_filename}"
-            
+    def __init__(self, directory, path, ttl_seconds, max_bytes):
+        self.directory = directory
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS artifacts (filename TEXT PRIMARY KEY, size INTEGER NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL, content_key TEXT, payload TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_content_key ON artifacts (content_key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_last_access ON artifacts (last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _remove_file(self, filename):
+        try:
+            os.remove(os.path.join(self.directory, filename))
+        except FileNotFoundError:
+            pass
+
+    def _unindexed_files(self, indexed):
+        # File hasil generator yang tidak terindeks: sisa per-tabel/.partN, generasi yang sedang berjalan, atau dari versi lama
+        try:
+            with os.scandir(self.directory) as entries:
+                return [entry for entry in entries
+                        if entry.name not in indexed and self.generated_name.match(entry.name) and entry.is_file()]
+        except FileNotFoundError:
+            return []
+
+    def register(self, filename, content_key=None, payload=None):
+        now = time.time()
+        size = os.path.getsize(os.path.join(self.directory, filename))
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO artifacts (filename, size, created_at, last_access, content_key, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                         (filename, size, now, now, content_key, json.dumps(payload, ensure_ascii=False) if payload is not None else None))
+        self.enforce_quota(keep=filename)
+
+    def touch(self, filename):
+        with self._connect() as conn:
+            conn.execute("UPDATE artifacts SET last_access = ? WHERE filename = ?", (time.time(), filename))
+
+    def find(self, content_key):
+        # Payload respons artefak dengan kunci konten yang sama, jika filenya masih ada
+        with self._connect() as conn:
+            row = conn.execute("SELECT filename, payload FROM artifacts WHERE content_key = ? AND last_access >= ? ORDER BY created_at DESC LIMIT 1",
+                               (content_key, time.time() - self.ttl_seconds)).fetchone()
+        if row is None: return None
+        if not os.path.exists(os.path.join(self.directory, row[0])):
+            with self._connect() as conn: conn.execute("DELETE FROM artifacts WHERE filename = ?", (row[0],))
+            return None
+        self.touch(row[0])
+        return json.loads(row[1])
+
+    def enforce_quota(self, keep=None):
+        # Gusur artefak yang paling lama tidak diakses sampai total ukuran <= kuota.
+        # File tak terindeks ikut dihitung (tidak digusur di sini: bisa jadi generasi yang sedang berjalan; dibersihkan cleanup setelah TTL)
+        if self.max_bytes <= 0: return 0
+        removed = 0
+        with self._connect() as conn:
+            artifacts = conn.execute("SELECT filename, size FROM artifacts ORDER BY last_access").fetchall()
+            total = sum(size for _, size in artifacts)
+            for entry in self._unindexed_files({filename for filename, _ in artifacts}):
+                try: total += entry.stat().st_size
+                except FileNotFoundError: pass
+            if total <= self.max_bytes: return 0
+            for filename, size in artifacts:
+                if total <= self.max_bytes: break
+                if filename == keep: continue
+                self._remove_file(filename)
+                conn.execute("DELETE FROM artifacts WHERE filename = ?", (filename,))
+                total -= size; removed += 1
+        return removed
+
+    def cleanup(self):
+        now = time.time()
+        with self._connect() as conn:
+            expired = [row[0] for row in conn.execute("SELECT filename FROM artifacts WHERE last_access < ?", (now - self.ttl_seconds,))]
+            for filename in expired: self._remove_file(filename)
+            conn.executemany("DELETE FROM artifacts WHERE filename = ?", [(filename,) for filename in expired])
+            indexed = {row[0] for row in conn.execute("SELECT filename FROM artifacts")}
+        # File hasil generator yang tidak terindeks & tidak diubah selama TTL
+        orphans = 0
+        for entry in self._unindexed_files(indexed):
+            try:
+                if entry.stat().st_mtime >= now - self.ttl_seconds: continue
+            except FileNotFoundError:
+                continue
+            self._remove_file(entry.name); orphans += 1
+        return {"expired": len(expired), "evicted": self.enforce_quota(), "orphans": orphans}
+
+    def stats(self):
+        with self._connect() as conn:
+            entries, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+            indexed = {row[0] for row in conn.execute("SELECT filename FROM artifacts")}
+        unindexed_bytes = 0
+        for entry in self._unindexed_files(indexed):
+            try: unindexed_bytes += entry.stat().st_size
+            except FileNotFoundError: pass
+        return {"entries": entries, "total_bytes": total_bytes, "unindexed_bytes": unindexed_bytes,
+                "max_bytes": self.max_bytes, "ttl_seconds": self.ttl_seconds}
+
+output_store = OutputStore(OUTPUT_DIR, OUTPUT_INDEX_PATH, OUTPUT_TTL_SECONDS, OUTPUT_MAX_BYTES) if IS_MAIN_PROCESS else None
+
+def output_cleanup_loop():
+    while True:
+        try:
+            result = output_store.cleanup()
+            if any(result.values()): print(f"Pembersihan OUTPUT_DIR: {result}")
+        except Exception as e:
+            print(f"Error saat membersihkan OUTPUT_DIR: {e}")
+        time.sleep(OUTPUT_CLEANUP_INTERVAL)
+
+# Hanya proses utama (bukan worker di generation pool) yang menjalankan pembersihan & pra-pembangunan pool Faker
+if IS_MAIN_PROCESS:
+    threading.Thread(target=output_cleanup_loop, name='output-cleanup', daemon=True).start()
+    if FAKER_POOLS == 'preload':
+        threading.Thread(target=preload_faker_pools, name='faker-pool-preload', daemon=True).start()
+
+def generation_content_key(plan):
+    # Hanya permintaan ber-seed yang deterministik; kunci mencakup semua yang memengaruhi isi output.
+    # Pemuatan ke target DB-API tidak menghasilkan artefak sehingga selalu dijalankan.
+    if plan['seed'] is None or plan['requested_format'] == 'dbapi': return None
+    uses_today = any(cd['type'] == 'date' and parse_options_str(cd.get('options', '') or '').get('end', 'today') == 'today'
+                     for _, columns_def, _ in plan['table_specs'] for cd in columns_def)
+    material = {name: plan[name] for name in ('requested_format', 'zip_compress_type', 'chunk_size', 'seed', 'database_context', 'table_specs')}
+    material['faker_locale'] = FAKER_LOCALE
+    material['faker_pools'] = [FAKER_POOLS, FAKER_POOL_SIZE, FAKER_VERSION]
+    material['today'] = datetime.date.today().isoformat() if uses_today else None
+    return hashlib.sha256(json.dumps(material, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def parse_generation_request(schema):
+    # Parsing, validasi & kompilasi permintaan generasi sekali per permintaan
+    # (dipakai /generate-data, /jobs, dan /generate-stream). Kesalahan input dilaporkan lewat SchemaValidationError.
+    # Semua error (struktur, opsi kolom, referensi, kapasitas unik) dikumpulkan lalu dilaporkan sekaligus;
+    # entri yang strukturnya rusak dilewati agar sisanya tetap bisa diperiksa.
+    schema_errors = validate_schema_definition(schema)
+    if not isinstance(schema, dict) or not isinstance(schema.get('tables', []), list): raise SchemaValidationError(schema_errors)
+    num_rows = schema.get('num_rows', 10) if is_row_count(schema.get('num_rows', 10)) else 0
+    tables_data = schema.get('tables', [])
+    requested_format = str(schema.get('requested_format', 'csv')).lower()
+
+    if requested_format not in OUTPUT_FORMATS and requested_format not in DATABASE_FORMATS:
+        requested_format = 'csv'
+    if requested_format in ARROW_FORMATS and pa is None:
+        schema_errors.append(f"Format '{requested_format}' membutuhkan paket pyarrow yang belum terpasang.")
+    database_target = schema.get('database_target')
+    if requested_format == 'dbapi' and database_target not in database_targets:
+        schema_errors.append(f"database_target harus salah satu dari: {', '.join(sorted(database_targets)) or '(belum ada target yang dikonfigurasi)'}.")
+    database_if_exists = schema.get('database_if_exists', 'fail')
+    if database_if_exists not in ('fail', 'replace'):
+        schema_errors.append("database_if_exists harus 'fail' atau 'replace'.")
+    # Zip multi-tabel: 'stored' (tanpa kompresi) atau 'deflated'; default stored untuk format yang sudah terkompresi
+    zip_compression = schema.get('zip_compression') or ('stored' if OUTPUT_FORMATS.get(requested_format, ('', False))[1] else 'deflated')
+    if zip_compression not in ('stored', 'deflated'):
+        schema_errors.append("zip_compression harus 'stored' atau 'deflated'.")
+
+    chunk_size = schema.get('chunk_size') or GENERATION_CHUNK_SIZE
+    if not is_row_count(chunk_size) or chunk_size <= 0:
+        schema_errors.append("chunk_size harus lebih besar dari 0.")
+        chunk_size = GENERATION_CHUNK_SIZE
+    try:
+        seed = normalize_seed(schema.get('seed'))
+    except SchemaValidationError as e:
+        schema_errors += e.errors
+        seed = None
+    if seed is not None:
+        # Blok baris tetap: nilai tiap blok hanya bergantung pada seed, bukan pada chunk_size atau jumlah shard
+        chunk_size = DETERMINISTIC_BLOCK_ROWS
+    if not tables_data: raise SchemaValidationError(schema_errors + ["Tidak ada definisi tabel."])
+
+    # Tiap tabel boleh punya num_rows sendiri (mis. tabel anak one-to-many); default num_rows global
+    table_specs = []
+    for table_index, table_def in enumerate(tables_data):
+        if not isinstance(table_def, dict) or not isinstance(table_def.get('columns', []), list): continue
+        table_name = table_def.get('name', f'TabelTanpaNama_{table_index + 1}')
+        columns_def = [cd for cd in table_def.get('columns', []) if is_column_definition(cd)]
+        if not isinstance(table_name, str) or not columns_def: continue
+        table_rows = table_def['num_rows'] if is_row_count(table_def.get('num_rows')) else num_rows
+        table_specs.append((table_name, columns_def, table_rows))
+
+    for table_name, _, table_rows in table_specs:
+        if requested_format == 'excel' and table_rows + 1 > EXCEL_MAX_ROWS:
+            schema_errors.append(f"Format Excel dibatasi {EXCEL_MAX_ROWS - 1} baris per tabel. Gunakan format CSV untuk {table_rows} baris ({table_name}).")
+
+    streams = [TableRandomStreams(seed, table_name) for table_name, _, _ in table_specs]
+    compiled_tables = []
+    for (table_name, columns_def, _), table_streams in zip(table_specs, streams):
+        column_generators, compile_errors = compile_table(table_name, columns_def, table_streams)
+        compiled_tables.append(column_generators)
+        schema_errors += compile_errors
+    generation_order, foreign_keys, dependency_errors = resolve_table_dependencies(table_specs, compiled_tables)
+    schema_errors += dependency_errors + validate_unique_columns(table_specs, compiled_tables)
+    if schema_errors: raise SchemaValidationError(schema_errors)
+
+    referenced_columns = {}
+    for parent_index, parent_col in foreign_keys.values(): referenced_columns.setdefault(parent_index, set()).add(parent_col)
+    return {
+        "requested_format": requested_format,
+        "zip_compress_type": zipfile.ZIP_STORED if zip_compression == 'stored' else zipfile.ZIP_DEFLATED,
+        "chunk_size": chunk_size,
+        "seed": seed,
+        "database_context": schema.get('database_context', "data umum"),
+        "database_target": database_target if requested_format == 'dbapi' else None,
+        "database_if_exists": database_if_exists,
+        "table_specs": table_specs, # (nama tabel, definisi kolom, jumlah baris)
+        "streams": streams, # TableRandomStreams per tabel
+        "column_generators": compiled_tables, # kolom terkompilasi per tabel
+        "generation_order": generation_order,
+        "foreign_keys": foreign_keys, # (indeks anak, kolom) -> (indeks induk, kolom induk)
+        "referenced_columns": referenced_columns # indeks induk -> kolom yang direferensikan
+    }
+
+def start_ai_prefetch(plan):
+    # --- TAHAP 1: Pra-pengambilan Saran AI untuk kolom 'ai_text' (paralel, di latar belakang) ---
+    ai_futures = {}
+    if gemini_model_instance or ai_suggestions_cache is not None: # Saran dari cache tetap bisa dipakai walau AI nonaktif
+        if not gemini_model_instance:
+            print("\n--- Model AI tidak aktif, hanya memakai saran AI dari cache ---")
+        print(f"\n--- Mengumpulkan saran AI (jika ada kolom 'ai_text', {NUM_AI_SUGGESTIONS_PER_COLUMN} saran per kolom) ---")
+        ai_futures = prefetch_ai_suggestions(plan['table_specs'], plan['database_context'], model=gemini_model_instance, pinned=plan['seed'] is not None)
+    else:
+        print("\n--- Model AI tidak aktif, melewati pengumpulan saran AI ---")
+    if plan['seed'] is not None and ai_suggestions_cache is None and any(has_ai_columns(columns_def) for _, columns_def, _ in plan['table_specs']):
+        print("  Peringatan: Cache saran AI nonaktif; kolom 'ai_text' tidak dapat direproduksi persis dengan seed.")
+    return ai_futures
+
+def collect_ai_suggestions(table_name, columns_def, ai_futures):
+    # Tunggu saran AI milik satu tabel (kolom 'ai_text' tanpa saran memakai daftar kosong)
+    ai_suggestions = {}
+    for col_def in columns_def:
+        future = ai_futures.get((table_name, col_def['name']))
+        if future is not None:
+            with generation_metrics.timed('ai_wait'): # Waktu generasi tertahan menunggu saran AI
+                ai_suggestions[col_def['name']] = future.result()
+            if not ai_suggestions[col_def['name']]:
+                print(f"  Peringatan: Tidak ada saran AI yang didapatkan untuk {table_name}.{col_def['name']}")
+        elif col_def['type'] == 'ai_text':
+            ai_suggestions[col_def['name']] = []
+        # Kolom unik tidak bisa diisi teks pengganti; laporkan sebagai kegagalan AI (bukan kesalahan skema)
+        if col_def['type'] == 'ai_text' and col_def.get('unique') and not ai_suggestions[col_def['name']]:
+            generation_metrics.increment('ai_failures')
+            raise AISuggestionError(f"Tidak ada saran AI yang didapatkan untuk kolom unik '{table_name}.{col_def['name']}'.")
+    return ai_suggestions
+
+def record_shard_result(result, requested_format):
+    generation_metrics.record(result['profile'])
+    generation_metrics.increment('rows_generated', result['rows'])
+    generation_metrics.increment(f"rows_generated.{requested_format}", result['rows'])
+
+def run_database_load(plan, ai_futures, content_key=None, tracker=None):
+    # Satu penulis per koneksi: tabel digenerate di proses ini (tanpa sharding) langsung ke database,
+    # induk sebelum anak. Gagal/dibatalkan -> transaksi di-rollback & tabel yang sudah dibuat dihapus.
+    table_specs, requested_format = plan['table_specs'], plan['requested_format']
+    if requested_format == 'sqlite':
+        artifact_filename = f"dbgenie_export_{datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')}.sqlite"
+        target = DatabaseTarget('sqlite', 'sqlite3', {"database": os.path.join(OUTPUT_DIR, artifact_filename)})
+    else:
+        artifact_filename = None
+        target = database_targets[plan['database_target']]
+    connection, paramstyle = target.connect()
+    cursor = connection.cursor()
+    key_index = {} # (indeks tabel induk, kolom) -> array kunci untuk kolom foreign_key
+    created_tables, loaded_tables, post_load = [], [], []
+    succeeded = False
+    if tracker is not None:
+        for table_index, (table_name, _, table_rows) in enumerate(table_specs): tracker.register_table(table_index, table_name, table_rows)
+    try:
+        if artifact_filename is not None:
+            # File baru milik kita sendiri: tanpa journal & fsync selama pemuatan (file dibuang jika gagal)
+            cursor.execute("PRAGMA journal_mode=OFF")
+            cursor.execute("PRAGMA synchronous=OFF")
+        if plan['database_if_exists'] == 'replace':
+            for table_index in reversed(plan['generation_order']):
+                cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(table_specs[table_index][0])}")
+            connection.commit()
+        for table_index in plan['generation_order']:
+            table_name, columns_def, table_rows = table_specs[table_index]
+            ai_suggestions = collect_ai_suggestions(table_name, columns_def, ai_futures)
+            child_refs = {col_name: parent_ref for (child_index, col_name), parent_ref in plan['foreign_keys'].items() if child_index == table_index}
+            column_generators = plan['column_generators'][table_index]
+            bind_table_inputs(column_generators, ai_suggestions, {col_name: key_index[parent_ref] for col_name, parent_ref in child_refs.items()})
+            foreign_refs = {col_name: (table_specs[parent_index][0], next(gen for gen in plan['column_generators'][parent_index] if gen.name == parent_col))
+                            for col_name, (parent_index, parent_col) in child_refs.items()}
+
+            if tracker is not None: tracker.check_cancelled()
+            print(f"\n--- Memuat data ke database ({target.name}) untuk tabel: {table_name} ({table_rows} baris) ---")
+            try:
+                cursor.execute(create_table_sql(table_name, column_generators, foreign_refs, target.dialect))
+            except Exception as e:
+                raise SchemaValidationError([f"Gagal membuat tabel '{table_name}' di database ({target.name}): {e}. "
+                                             "Gunakan database_if_exists=replace untuk menimpa tabel yang sudah ada."]) from e
+            created_tables.append(table_name)
+            task = build_shard_tasks(table_name, column_generators, plan['streams'][table_index], table_rows, plan['chunk_size'], requested_format,
+                                     DatabaseTableWriter(cursor, table_name, column_generators, paramstyle),
+                                     plan['referenced_columns'].get(table_index, ()), allow_sharding=False)[0]
+            if tracker is not None: tracker.attach(table_index, [task])
+            result = run_generation_shard(task)
+            connection.commit() # Satu transaksi besar per tabel
+            record_shard_result(result, requested_format)
+            for col_name, keys in result['keys'].items(): key_index[(table_index, col_name)] = keys
+            loaded_tables.append({"table_name": table_name, "rows": result['rows']})
+            post_load.append(post_load_sql(table_name, column_generators, foreign_refs, target.dialect))
+
+        with generation_metrics.timed('build_indexes'):
+            # Constraint unik semua tabel lebih dulu: foreign key membutuhkan kolom induk yang unik
+            for statement in [sql for unique_statements, _ in post_load for sql in unique_statements] + \
+                             [sql for _, foreign_statements in post_load for sql in foreign_statements]:
+                cursor.execute(statement)
+            connection.commit()
+        succeeded = True
+    except BaseException:
+        connection.rollback()
+        if artifact_filename is None:
+            for table_name in reversed(created_tables):
+                try: cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(table_name)}")
+                except Exception as e: print(f"  Gagal menghapus tabel '{table_name}' setelah pemuatan gagal: {e}")
+            connection.commit()
+        raise
+    finally:
+        connection.close()
+        if artifact_filename is not None and not succeeded and os.path.exists(os.path.join(OUTPUT_DIR, artifact_filename)):
+            os.remove(os.path.join(OUTPUT_DIR, artifact_filename))
+    print(f"  {len(loaded_tables)} tabel telah dimuat ke database ({target.name}).")
+
+    response_payload = {"database": {"target": target.name, "tables": loaded_tables}}
+    if artifact_filename is not None:
+        response_payload["download_info"] = {
+            "is_zip": False,
+            "files": [{
+                "table_name": artifact_filename.rsplit('.', 1)[0],
+                "url": f"/download/{artifact_filename}",
+                "filename": artifact_filename,
+                "format": requested_format
+            }]
+        }
+    if plan['seed'] is not None: response_payload["seed"] = plan['seed']
+    if artifact_filename is not None: output_store.register(artifact_filename, content_key, response_payload)
+    return response_payload
+
+def run_generation(schema, tracker=None):
+    # Inti /generate-data; dipakai langsung oleh endpoint sinkron maupun oleh job asinkron.
+    with generation_metrics.timed('parse'):
+        plan = parse_generation_request(schema)
+    requested_format, chunk_size, seed = plan['requested_format'], plan['chunk_size'], plan['seed']
+    table_specs, foreign_keys, referenced_columns = plan['table_specs'], plan['foreign_keys'], plan['referenced_columns']
+    content_key = generation_content_key(plan)
+    if content_key is not None:
+        cached_payload = output_store.find(content_key)
+        if cached_payload is not None:
+            print("\n--- Memakai ulang hasil generasi ber-seed yang identik ---")
+            generation_metrics.increment('outputs_reused')
+            return cached_payload
+    ai_futures = start_ai_prefetch(plan)
+    if requested_format in DATABASE_FORMATS: return run_database_load(plan, ai_futures, content_key, tracker)
+
+    # --- TAHAP 2: Generasi Data Aktual ---
+    # Tabel induk dijadwalkan sebelum anaknya; tabel tanpa kolom 'ai_text' didahulukan selagi saran AI masih diambil.
+    # Permintaan kecil dikerjakan langsung di proses ini; yang besar disebar ke process pool.
+    use_pool = GENERATION_PROCESSES > 1 and sum(table_rows for _, _, table_rows in table_specs) >= PARALLEL_MIN_ROWS
+    pool = get_generation_pool() if use_pool else None
+    key_index = {} # (indeks tabel induk, kolom) -> array kunci, dirakit dari hasil shard induk
+    def parent_key_array(parent_index, parent_col):
+        if (parent_index, parent_col) not in key_index:
+            shard_futures = scheduled[parent_index][-1]
+            key_index[(parent_index, parent_col)] = np.concatenate([future.result()['keys'][parent_col] for future in shard_futures])
+        return key_index[(parent_index, parent_col)]
+    scheduled = {}
+    processed_files_details = []
+    if tracker is not None:
+        for table_index, (table_name, _, table_rows) in enumerate(table_specs): tracker.register_table(table_index, table_name, table_rows)
+    try:
+        for table_index in plan['generation_order']:
+            table_name, columns_def, table_rows = table_specs[table_index]
+            ai_suggestions = collect_ai_suggestions(table_name, columns_def, ai_futures)
+
+            # Anak menunggu shard induknya selesai; kunci induk dikirim sebagai array ke setiap shard anak
+            parent_keys = {col_name: parent_key_array(*parent_ref) for (child_index, col_name), parent_ref in foreign_keys.items()
+                           if child_index == table_index}
+
+            column_generators = plan['column_generators'][table_index]
+            bind_table_inputs(column_generators, ai_suggestions, parent_keys)
+
+            if tracker is not None: tracker.check_cancelled()
+            actual_filename, file_path, stable_filename = table_output_file(table_name, requested_format)
+            tasks = build_shard_tasks(table_name, column_generators, plan['streams'][table_index], table_rows, chunk_size, requested_format, file_path,
+                                      referenced_columns.get(table_index, ()), block_members=seed is not None)
+            if tracker is not None: tracker.attach(table_index, tasks)
+            print(f"\n--- Menghasilkan data untuk tabel: {table_name} ({table_rows} baris, {len(tasks)} shard) ---")
+            shard_futures = [pool.submit(run_generation_shard, task) if pool else run_inline(run_generation_shard, task) for task in tasks]
+            scheduled[table_index] = (table_name, actual_filename, file_path, stable_filename, tasks, shard_futures)
+
+        for table_index in sorted(scheduled):
+            table_name, actual_filename, file_path, stable_filename, tasks, shard_futures = scheduled[table_index]
+            for future in shard_futures: record_shard_result(future.result(), requested_format)
+            with generation_metrics.timed('merge_shards'):
+                concatenate_shard_files(file_path, tasks)
             processed_files_details.append({
                 "table_name": table_name,
-                "url": file_url_for_download,
+                "url": f"/download/{actual_filename}",
                 "filename": actual_filename,
                 "format": requested_format,
-                "path_for_zip": file_path_for_zip
+                "path_for_zip": file_path,
+                "arcname": stable_filename if seed is not None else actual_filename
             })
             print(f"  Tabel '{table_name}' telah digenerate dan disimpan sebagai '{actual_filename}'.")
-        
-        if not processed_files_details: return jsonify({"error": "Tidak ada file yang digenerate."}), 400
+    except BaseException:
+        # Gagal/dibatalkan: hentikan shard yang belum mulai, tunggu yang sedang berjalan berhenti,
+        # lalu buang semua file shard & file tabel (termasuk tabel yang sudah selesai digabung)
+        for _, _, _, _, tasks, shard_futures in scheduled.values():
+            for future in shard_futures: future.cancel()
+            concurrent.futures.wait(shard_futures)
+            discard_shard_outputs(tasks)
+        raise
+
+    if not processed_files_details: raise SchemaValidationError(["Tidak ada file yang digenerate."])
 
-        response_payload = {"download_info": {}}
-        if len(processed_files_details) > 1:
-            zip_filename = f"dbgenie_export_{requested_format}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.zip"
-            zip_path = os.path.join(OUTPUT_DIR, zip_filename)
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+    response_payload = {"download_info": {}}
+    if len(processed_files_details) > 1:
+        zip_filename = f"dbgenie_export_{requested_format}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')}.zip"
+        zip_path = os.path.join(OUTPUT_DIR, zip_filename)
+        zip_started = time.perf_counter()
+        try:
+            with zipfile.ZipFile(zip_path, 'w', plan['zip_compress_type']) as zipf:
                 for file_info in processed_files_details:
-                    if os.path.exists(file_info['path_for_zip']):
-                        zipf.write(file_info['path_for_zip'], arcname=file_info['filename'])
-            
-            response_payload["download_info"] = {
-                "is_zip": True,
-                "url": f"/download/{zip_filename}",
-                "filename": zip_filename,
-                "format": requested_format
-            }
-        elif processed_files_details:
-            single_file_info = processed_files_details[0]
-            response_payload["download_info"] = {
-                "is_zip": False,
-                "files": [{
-                    "table_name": single_file_info["table_name"],
-                    "url": single_file_info["url"],
-                    "filename": single_file_info["filename"],
-                    "format": single_file_info["format"]
-                }]
-            }
-        else:
-            return jsonify({"error": "Gagal menggenerate file akhir."}), 500
+                    if not os.path.exists(file_info['path_for_zip']): continue
+                    if seed is None:
+                        zipf.write(file_info['path_for_zip'], arcname=file_info['arcname'])
+                        continue
+                    # Mode seed: nama & timestamp entri tetap agar arsip juga identik byte-per-byte
+                    zip_info = zipfile.ZipInfo(file_info['arcname'], date_time=(1980, 1, 1, 0, 0, 0))
+                    zip_info.compress_type = plan['zip_compress_type']
+                    with open(file_info['path_for_zip'], 'rb') as src_f, zipf.open(zip_info, 'w') as dst_f:
+                        shutil.copyfileobj(src_f, dst_f, 1024 * 1024)
+        except BaseException:
+            if os.path.exists(zip_path): os.remove(zip_path)
+            raise
+        finally:
+            # File per-tabel tidak disajikan terpisah setelah masuk zip (dan dibuang jika zip gagal)
+            for file_info in processed_files_details:
+                if os.path.exists(file_info['path_for_zip']): os.remove(file_info['path_for_zip'])
+        generation_metrics.record_stage('zip', time.perf_counter() - zip_started)
+        artifact_filename = zip_filename
         
-        return jsonify(response_payload)
+        response_payload["download_info"] = {
+            "is_zip": True,
+            "url": f"/download/{zip_filename}",
+            "filename": zip_filename,
+            "format": requested_format
+        }
+    elif processed_files_details:
+        single_file_info = processed_files_details[0]
+        artifact_filename = single_file_info["filename"]
+        response_payload["download_info"] = {
+            "is_zip": False,
+            "files": [{
+                "table_name": single_file_info["table_name"],
+                "url": single_file_info["url"],
+                "filename": single_file_info["filename"],
+                "format": single_file_info["format"]
+            }]
+        }
+
+    if seed is not None: response_payload["seed"] = seed
+    output_store.register(artifact_filename, content_key, response_payload)
+    return response_payload
+
+# --- Unduhan streaming ---
+# Data digenerate per potongan oleh thread produsen langsung ke respons HTTP chunked (tanpa menyentuh disk).
+# Skema multi-tabel dibungkus zip streaming (zipfile menulis data descriptor karena output tidak bisa di-seek).
+
+class StreamingResponseBuffer(io.RawIOBase):
+    # File-like tulis-saja yang meneruskan byte ke iterator respons lewat antrean terbatas:
+    # produsen berhenti sejenak jika klien lambat membaca, dan berhenti total jika klien putus.
+    def __init__(self):
+        super().__init__()
+        self.queue = queue.Queue(STREAM_QUEUE_CHUNKS)
+        self.cancel = threading.Event()
+        self.pending = bytearray()
+        self.position = 0
+        self.error = None
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        # zipfile & pyarrow hanya butuh posisi tulis, bukan seek
+        return self.position
+
+    def write(self, data):
+        self.pending += data
+        self.position += len(data)
+        if len(self.pending) >= STREAM_BUFFER_BYTES: self.flush()
+        return len(data)
+
+    def flush(self):
+        if not self.pending: return
+        self._put(bytes(self.pending))
+        self.pending.clear()
+
+    def _put(self, item):
+        while not self.cancel.is_set():
+            try:
+                self.queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise GenerationCancelled()
 
+    def finish(self, error=None):
+        # Dipanggil produsen tepat sekali; None di antrean menandai akhir aliran
+        self.error = error
+        try:
+            if error is None: self.flush()
+            self._put(None)
+        except GenerationCancelled:
+            pass
+
+    def iter_bytes(self):
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None: break
+                yield item
+            if self.error is not None: raise self.error
+        finally:
+            # Klien selesai atau terputus -> hentikan produsen
+            self.cancel.set()
+
+def stream_generation(plan, ai_futures, buffer):
+    # Dijalankan di thread produsen; tabel dikerjakan berurutan (induk sebelum anak) tanpa sharding
+    table_specs = plan['table_specs']
+    key_index = {} # (indeks tabel induk, kolom) -> array kunci untuk kolom foreign_key
+    zipf = zipfile.ZipFile(buffer, 'w', plan['zip_compress_type']) if len(table_specs) > 1 else None
+    date_time = (1980, 1, 1, 0, 0, 0) if plan['seed'] is not None else datetime.datetime.now().timetuple()[:6]
+    try:
+        for table_index in plan['generation_order']:
+            table_name, columns_def, table_rows = table_specs[table_index]
+            ai_suggestions = collect_ai_suggestions(table_name, columns_def, ai_futures)
+            parent_keys = {col_name: key_index[parent_ref] for (child_index, col_name), parent_ref in plan['foreign_keys'].items()
+                           if child_index == table_index}
+            column_generators = plan['column_generators'][table_index]
+            bind_table_inputs(column_generators, ai_suggestions, parent_keys)
+            task = build_shard_tasks(table_name, column_generators, plan['streams'][table_index], table_rows, plan['chunk_size'], plan['requested_format'],
+                                     None, plan['referenced_columns'].get(table_index, ()), allow_sharding=False,
+                                     block_members=plan['seed'] is not None)[0]
+            task['cancel'] = buffer.cancel
+            print(f"\n--- Streaming data untuk tabel: {table_name} ({table_rows} baris) ---")
+            if zipf is None:
+                task['path'] = buffer
+                result = run_generation_shard(task)
+            else:
+                zip_info = zipfile.ZipInfo(table_output_file(table_name, plan['requested_format'])[2], date_time=date_time)
+                zip_info.compress_type = plan['zip_compress_type']
+                with zipf.open(zip_info, 'w', force_zip64=True) as entry_f:
+                    task['path'] = entry_f
+                    result = run_generation_shard(task)
+            record_shard_result(result, plan['requested_format'])
+            for col_name, keys in result['keys'].items(): key_index[(table_index, col_name)] = keys
+        if zipf is not None: zipf.close()
+        buffer.finish()
+    except GenerationCancelled:
+        print("  Streaming dihentikan: klien terputus.")
+        buffer.finish(GenerationCancelled())
+    except Exception as e:
+        import traceback
+        print(f"Error saat streaming data: {traceback.format_exc()}")
+        buffer.finish(e)
+
+@app.route('/generate-data', methods=['POST'])
+def handle_generate_data():
+    generation_metrics.increment('requests.generate_data')
+    try:
+        with generation_metrics.timed('request_total'):
+            return jsonify(run_generation(request.json))
+    except SchemaValidationError as e:
+        generation_metrics.increment('validation_errors')
+        return jsonify({"error": f"Skema tidak valid: {str(e)}", "details": e.errors}), 400
+    except AISuggestionError as e:
+        return jsonify({"error": f"Saran AI tidak tersedia: {str(e)}"}), 502
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
         print(f"Error saat generate data: {error_trace}")
         return jsonify({"error": f"Kesalahan server internal: {str(e)}. Detail ada di log."}), 500
 
+@app.route('/generate-stream', methods=['POST'])
+def stream_generated_data():
+    # Skema dikirim sebagai body JSON, atau field form 'schema' (agar browser bisa mengunduh langsung lewat form)
+    schema = request.get_json(silent=True)
+    if schema is None and request.form.get('schema'):
+        try: schema = json.loads(request.form['schema'])
+        except ValueError: schema = None
+    if not isinstance(schema, dict): return jsonify({"error": "Body harus berupa skema JSON."}), 400
+    generation_metrics.increment('requests.generate_stream')
+    try:
+        with generation_metrics.timed('parse'):
+            plan = parse_generation_request(schema)
+        if plan['requested_format'] == 'excel' or plan['requested_format'] in DATABASE_FORMATS:
+            raise SchemaValidationError([f"Format '{plan['requested_format']}' tidak mendukung streaming. Gunakan /generate-data atau /jobs."])
+    except SchemaValidationError as e:
+        generation_metrics.increment('validation_errors')
+        return jsonify({"error": f"Skema tidak valid: {str(e)}", "details": e.errors}), 400
+
+    buffer = StreamingResponseBuffer()
+    threading.Thread(target=stream_generation, args=(plan, start_ai_prefetch(plan), buffer), daemon=True).start()
+    if len(plan['table_specs']) > 1:
+        filename = f"dbgenie_export_{plan['requested_format']}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.zip"
+        mimetype = 'application/zip'
+    else:
+        filename = table_output_file(plan['table_specs'][0][0], plan['requested_format'])[2]
+        mimetype = STREAM_MIMETYPES[plan['requested_format']]
+    return Response(buffer.iter_bytes(), mimetype=mimetype, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-store",
+        "X-Accel-Buffering": "no" # Matikan buffering proxy (nginx) agar byte pertama langsung terkirim
+    })
+
+@app.route('/jobs', methods=['POST'])
+def submit_generation_job():
+    schema = request.get_json(silent=True)
+    if not isinstance(schema, dict): return jsonify({"error": "Body harus berupa skema JSON."}), 400
+    job_id = uuid.uuid4().hex
+    generation_metrics.increment('requests.jobs')
+    job_store.create(job_id)
+    ensure_job_heartbeat()
+    job_executor.submit(run_generation_job, job_id, schema)
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}", "cancel_url": f"/jobs/{job_id}/cancel"}), 202
+
+@app.route('/jobs/<job_id>')
+def generation_job_status(job_id):
+    job = job_store.get(job_id)
+    if job is None: return jsonify({"error": "Job tidak ditemukan."}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_generation_job(job_id):
+    job = job_store.get(job_id)
+    if job is None: return jsonify({"error": "Job tidak ditemukan."}), 404
+    if not job_store.request_cancel(job_id):
+        return jsonify({"error": f"Job sudah selesai dengan status '{job['status']}'."}), 409
+    return jsonify({"job_id": job_id, "cancel_requested": True}), 202
+
+@app.route('/ai-cache/stats')
+def ai_cache_stats():
+    if ai_suggestions_cache is None: return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **ai_suggestions_cache.stats()})
+
+@app.route('/metrics')
+def generation_metrics_route():
+    # Waktu per tahap & throughput per tipe kolom sejak worker ini mulai (untuk deteksi regresi & sizing worker)
+    return jsonify({**generation_metrics.snapshot(), "outputs": output_store.stats()})
+
 @app.route('/download/<filename>')
 def download_file(filename):
     if ".." in filename or filename.startswith("/"):
         return "Nama file tidak valid.", 400
+    output_store.touch(filename) # Perpanjang TTL & jadikan terbaru untuk LRU
     return send_from_directory(OUTPUT_DIR, filename, as_attachment=True)
 
 if __name__ == '__main__':
@@ -0,0 +1,206 @@
+# Benchmark generator data DBGenie.
+# Menjalankan skema standar (mencakup semua tipe kolom) untuk beberapa jumlah baris & semua format output,
+# dengan model AI diganti model palsu lokal. Tiap kasus berjalan di proses Python baru agar peak RSS terukur
+# per kasus; waktu per tahap diambil dari instrumentasi yang sama dengan endpoint /metrics.
+#
+# Contoh:
+#   python benchmark.py                                   # semua skema x format, 10rb & 100rb baris
+#   python benchmark.py --rows 1000000 --formats csv,parquet --processes 4
+#   python benchmark.py --json hasil.json                 # simpan hasil
+#   python benchmark.py --compare hasil.json              # bandingkan baris/detik dengan hasil sebelumnya
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+FORMATS = ('csv', 'csv_gzip', 'csv_zstd', 'excel', 'parquet', 'arrow', 'sqlite')
+EXCEL_MAX_DATA_ROWS = 1048575
+RESULT_PREFIX = 'BENCHMARK_RESULT '
+STAGES = ('parse', 'ai_wait', 'prepare', 'generate', 'frame', 'write', 'merge_shards', 'zip', 'build_indexes')
+
+# Skema standar; num_rows tabel induk relasional diturunkan dari jumlah baris kasus
+STANDARD_SCHEMAS = {
+    'semua_tipe': lambda rows: [{"name": "Pelanggan", "columns": [
+        {"name": "kode", "type": "string", "options": "min_len=6,max_len=12"},
+        {"name": "nama", "type": "fullname"},
+        {"name": "alamat", "type": "address", "nullable": True, "nullable_chance": 10},
+        {"name": "email", "type": "email"},
+        {"name": "umur", "type": "integer", "options": "min=17,max=80"},
+        {"name": "saldo", "type": "float", "options": "min=0,max=1000000,precision=2", "nullable": True, "nullable_chance": 5},
+        {"name": "tgl_daftar", "type": "date", "options": "start=2015-01-01,end=2024-12-31"},
+        {"name": "token", "type": "uuid"},
+        {"name": "aktif", "type": "boolean"},
+        {"name": "segmen", "type": "custom_list", "options": "bronze,silver,gold,platinum"},
+        {"name": "catatan", "type": "text"},
+        {"name": "deskripsi_minat", "type": "ai_text"},
+    ]}],
+    'unik': lambda rows: [{"name": "Akun", "columns": [
+        {"name": "id", "type": "integer", "options": "min=1,max=1000000000", "unique": True},
+        {"name": "username", "type": "string", "options": "min_len=8,max_len=8", "unique": True},
+        {"name": "email", "type": "email", "unique": True},
+        {"name": "token", "type": "uuid", "unique": True},
+        {"name": "tgl_lahir", "type": "date", "options": "start=1950-01-01,end=2005-12-31"},
+    ]}],
+    'relasional': lambda rows: [
+        {"name": "Produk", "num_rows": max(rows // 10, 1), "columns": [
+            {"name": "id", "type": "integer", "options": "min=1,max=100000000", "unique": True},
+            {"name": "nama_produk", "type": "ai_text"},
+            {"name": "harga", "type": "float", "options": "min=1000,max=5000000,precision=0"},
+        ]},
+        {"name": "Pesanan", "columns": [
+            {"name": "id", "type": "uuid", "unique": True},
+            {"name": "produk_id", "type": "foreign_key", "options": "ref=Produk.id,skew=1.1"},
+            {"name": "jumlah", "type": "integer", "options": "min=1,max=20"},
+            {"name": "tgl_pesan", "type": "date", "options": "start=2023-01-01,end=2024-12-31"},
+        ]},
+    ],
+}
+
+class FakeAIResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeAIModel:
+    # Pengganti GenerativeModel: latensi tetap, jumlah saran sesuai prompt
+    def __init__(self, latency):
+        self.latency = latency
+
+    def generate_content(self, prompt, generation_config=None):
+        time.sleep(self.latency)
+        match = re.search(r"Berikan (\d+)", prompt)
+        count = int(match.group(1)) if match else 20
+        return FakeAIResponse(json.dumps([f"saran-{i}" for i in range(count)]))
+
+def peak_rss_mb(who):
+    # ru_maxrss dalam KB di Linux, byte di macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def warm_up_worker():
+    import app # noqa: F401
+    time.sleep(0.5) # Tahan proses ini agar tugas pemanasan berikutnya jatuh ke proses lain
+
+def run_case(case):
+    # Dijalankan di proses anak; lingkungan (direktori sementara, cache AI nonaktif) disiapkan sebelum import app
+    import app
+    app.gemini_model_instance = FakeAIModel(case['ai_latency'])
+    if app.GENERATION_PROCESSES > 1:
+        # Panaskan process pool (spawn + import app di tiap proses) agar tidak ikut terukur
+        pool = app.get_generation_pool()
+        for future in [pool.submit(warm_up_worker) for _ in range(app.GENERATION_PROCESSES)]: future.result()
+    schema = {
+        "num_rows": case['rows'],
+        "requested_format": case['format'],
+        "database_context": "benchmark toko online",
+        "tables": STANDARD_SCHEMAS[case['schema']](case['rows']),
+    }
+    app.generation_metrics.reset()
+    started = time.perf_counter()
+    payload = app.run_generation(schema)
+    elapsed = time.perf_counter() - started
+    metrics = app.generation_metrics.snapshot()
+    download_info = payload['download_info']
+    filenames = [download_info['filename']] if download_info.get('is_zip') else [f['filename'] for f in download_info['files']]
+    output_bytes = sum(os.path.getsize(os.path.join(app.OUTPUT_DIR, filename)) for filename in filenames)
+    if app._generation_pool is not None: app._generation_pool.shutdown() # Agar RSS proses pool masuk RUSAGE_CHILDREN
+    rows_total = metrics['counters'].get('rows_generated', 0)
+    return {
+        **case,
+        "rows_total": rows_total,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows_total / elapsed, 1) if elapsed > 0 else None,
+        "output_bytes": output_bytes,
+        "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF),
+        "peak_child_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        "stages": {stage: info['total_seconds'] for stage, info in metrics['stages'].items()},
+        "column_types": metrics['column_types'],
+    }
+
+def spawn_case(case, workdir, processes, timeout):
+    env = dict(os.environ,
+               OUTPUT_DIR=os.path.join(workdir, 'output'),
+               CACHE_DIR=os.path.join(workdir, 'cache'),
+               AI_CACHE_MAX_ENTRIES='0',
+               OUTPUT_MAX_BYTES='0',
+               OUTPUT_CLEANUP_INTERVAL='86400',
+               GENERATION_PROCESSES=str(processes))
+    env.pop('GEMINI_API_KEY', None) # Jangan pernah memanggil API sungguhan
+    try:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-case', json.dumps(case)],
+                              capture_output=True, text=True, env=env, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {**case, "error": f"timeout {timeout} detik"}
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX): return json.loads(line[len(RESULT_PREFIX):])
+    return {**case, "error": (proc.stderr.strip().splitlines() or ['proses gagal tanpa output'])[-1]}
+
+def print_result(result, baseline, detail):
+    label = f"{result['schema']:<11} {result['format']:<9} {result['rows']:>9}"
+    if 'error' in result:
+        print(f"{label}  GAGAL: {result['error']}")
+        return
+    stages = " ".join(f"{result['stages'].get(stage, 0):>7.2f}" for stage in STAGES)
+    change = ''
+    previous = baseline.get((result['schema'], result['format'], result['rows']))
+    if previous and previous.get('rows_per_second'):
+        change = f" {100 * (result['rows_per_second'] / previous['rows_per_second'] - 1):+6.1f}%"
+    print(f"{label} {result['seconds']:>8.2f} {result['rows_per_second']:>11.0f}{change} "
+          f"{result['peak_rss_mb']:>7.0f} {result['peak_child_rss_mb']:>7.0f} {result['output_bytes'] / 1024 ** 2:>8.1f}  {stages}")
+    if detail:
+        for col_type, info in sorted(result['column_types'].items(), key=lambda item: -item[1]['seconds']):
+            print(f"    {col_type:<12} {info['values']:>10} nilai {info['seconds']:>8.3f} dtk {info['values_per_second'] or 0:>14.0f} nilai/dtk")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generator data (AI diganti model palsu lokal).")
+    parser.add_argument('--rows', default='10000,100000', help="daftar jumlah baris, dipisah koma")
+    parser.add_argument('--formats', default=','.join(FORMATS), help="daftar format output, dipisah koma")
+    parser.add_argument('--schemas', default=','.join(STANDARD_SCHEMAS), help="daftar skema standar, dipisah koma")
+    parser.add_argument('--processes', type=int, default=1, help="GENERATION_PROCESSES untuk setiap kasus")
+    parser.add_argument('--ai-latency', type=float, default=0.2, help="latensi palsu per permintaan AI (detik)")
+    parser.add_argument('--timeout', type=float, default=1800, help="batas waktu per kasus (detik)")
+    parser.add_argument('--json', help="simpan hasil ke file JSON")
+    parser.add_argument('--compare', help="file JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument('--detail', action='store_true', help="tampilkan throughput per tipe kolom")
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(RESULT_PREFIX + json.dumps(run_case(json.loads(args.run_case))))
+        return
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = {(r['schema'], r['format'], r['rows']): r for r in json.load(f)['results']}
+    formats = [f.strip() for f in args.formats.split(',') if f.strip()]
+    schemas = [s.strip() for s in args.schemas.split(',') if s.strip()]
+    unknown = [f for f in formats if f not in FORMATS] + [s for s in schemas if s not in STANDARD_SCHEMAS]
+    if unknown: parser.error(f"format/skema tidak dikenal: {', '.join(unknown)}")
+
+    print(f"{'skema':<11} {'format':<9} {'baris':>9} {'detik':>8} {'baris/dtk':>11} {'RSS MB':>7} {'anak MB':>7} {'output MB':>8}  "
+          + " ".join(f"{stage[:7]:>7}" for stage in STAGES))
+    results = []
+    with tempfile.TemporaryDirectory(prefix='dbgenie-bench-') as workdir:
+        for rows in [int(r) for r in args.rows.split(',') if r.strip()]:
+            for schema in schemas:
+                for output_format in formats:
+                    if output_format == 'excel' and rows > EXCEL_MAX_DATA_ROWS:
+                        print(f"{schema:<11} {output_format:<9} {rows:>9}  dilewati: melebihi batas baris Excel")
+                        continue
+                    case = {"schema": schema, "format": output_format, "rows": rows, "ai_latency": args.ai_latency}
+                    result = spawn_case(case, workdir, args.processes, args.timeout)
+                    print_result(result, baseline, args.detail)
+                    results.append(result)
+    print("Waktu tahap (detik) dijumlahkan lintas shard; bisa melebihi waktu dinding jika GENERATION_PROCESSES > 1.")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"created_at": time.strftime('%Y-%m-%dT%H:%M:%S'), "processes": args.processes, "results": results}, f, indent=2)
+        print(f"Hasil disimpan ke {args.json}")
+
+if __name__ == '__main__':
+    main()
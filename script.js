@@ -5,8 +5,11 @@ document.addEventListener('DOMContentLoaded', () => {
     const tableTemplate = document.getElementById('table-template');
     const columnTemplate = document.getElementById('column-template');
     const generateBtn = document.getElementById('generate-btn');
+    const streamBtn = document.getElementById('stream-btn');
     const downloadLinksContainer = document.getElementById('download-links');
     const numRowsInput = document.getElementById('num-rows');
+    const seedInput = document.getElementById('seed');
+    const zipStoredCheckbox = document.getElementById('zip-stored');
 
     const aiContextInput = document.getElementById('ai-context');
     const suggestSchemaBtn = document.getElementById('suggest-schema-btn');
@@ -25,6 +28,8 @@ document.addEventListener('DOMContentLoaded', () => {
             case 'date': columnOptionsInput.placeholder = "start=2020-01-01,end=today"; break;
             case 'custom_list': columnOptionsInput.placeholder = "item1,item2,item3"; break;
             case 'ai_text': columnOptionsInput.placeholder = "Additional instructions for AI (optional)"; break;
+            case 'foreign_key': columnOptionsInput.placeholder = "ref=Tabel.kolom,min_children=1,max_children=5,skew=1"; break;
+            case 'fullname': case 'address': case 'email': case 'text': columnOptionsInput.placeholder = "pool=true (optional, faster)"; break;
             default: columnOptionsInput.placeholder = "No specific options"; columnOptionsInput.style.display = 'none';
         }
     }
@@ -54,9 +59,10 @@ document.addEventListener('DOMContentLoaded', () => {
         removeColumnBtn.addEventListener('click', (e) => e.target.closest('.column-definition').remove());
         columnsContainer.appendChild(columnNode);
     }
-    function addTableToUI(name = '', columns = []) {
+    function addTableToUI(name = '', columns = [], numRows = '') {
         const tableNode = tableTemplate.content.cloneNode(true);
         const tableNameInput = tableNode.querySelector('.table-name');
+        tableNode.querySelector('.table-num-rows').value = numRows || '';
         const addColumnBtn = tableNode.querySelector('.add-column-btn');
         const removeTableBtn = tableNode.querySelector('.remove-table-btn');
         const columnsContainer = tableNode.querySelector('.columns-container');
@@ -91,7 +97,7 @@ document.addEventListener('DOMContentLoaded', () => {
             const suggestedSchema = await response.json();
             tablesContainer.innerHTML = ''; 
             if (suggestedSchema.tables && suggestedSchema.tables.length > 0) {
-                suggestedSchema.tables.forEach(table => addTableToUI(table.name, table.columns));
+                suggestedSchema.tables.forEach(table => addTableToUI(table.name, table.columns, table.num_rows));
                 aiStatus.textContent = "Schema suggestions loaded successfully! Please review and adjust.";
             } else {
                 aiStatus.textContent = "AI did not provide valid schema suggestions. Please try again.";
@@ -106,7 +112,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
-    generateBtn.addEventListener('click', async () => {
+    function buildSchemaFromUI() {
         // BARU: Ambil format output yang dipilih
         const selectedOutputFormat = document.querySelector('input[name="outputFormat"]:checked')?.value || 'csv';
 
@@ -116,11 +122,18 @@ document.addEventListener('DOMContentLoaded', () => {
             database_context: aiContextInput.value.trim() || "data umum",
             requested_format: selectedOutputFormat // BARU: Kirim format yang diminta
         };
+        // Seed yang sama menghasilkan data yang sama persis
+        if (seedInput.value.trim()) schema.seed = seedInput.value.trim();
+        // Tanpa centang, server memilih sendiri (stored untuk format yang sudah terkompresi)
+        if (zipStoredCheckbox.checked) schema.zip_compression = 'stored';
 
-        document.querySelectorAll('.table-definition').forEach(tableEl => {
+        document.querySelectorAll('.table-definition').forEach((tableEl, tableIndex) => {
             // ... (logika pengumpulan tabel dan kolom SAMA SEPERTI SEBELUMNYA) ...
-            const tableName = tableEl.querySelector('.table-name').value.trim() || `TabelTanpaNama_${Date.now()}`;
+            const tableName = tableEl.querySelector('.table-name').value.trim() || `TabelTanpaNama_${tableIndex + 1}`;
             const tableData = { name: tableName, columns: [] };
+            // Jumlah baris per tabel (opsional), mis. tabel anak one-to-many lebih banyak dari induknya
+            const tableNumRows = parseInt(tableEl.querySelector('.table-num-rows').value);
+            if (tableNumRows > 0) tableData.num_rows = tableNumRows;
             tableEl.querySelectorAll('.column-definition').forEach(colEl => {
                 const columnName = colEl.querySelector('.column-name').value.trim() || `KolomTanpaNama_${Date.now()}`;
                 tableData.columns.push({
@@ -134,13 +147,39 @@ document.addEventListener('DOMContentLoaded', () => {
             if (tableData.columns.length > 0) schema.tables.push(tableData);
         });
 
-        if (schema.tables.length === 0) { alert("Silakan definisikan setidaknya satu tabel dengan kolom."); return; }
+        if (schema.tables.length === 0) { alert("Silakan definisikan setidaknya satu tabel dengan kolom."); return null; }
+        return schema;
+    }
+
+    // Unduhan streaming: form POST biasa agar browser menyimpan langsung ke disk sambil data digenerate
+    streamBtn.addEventListener('click', () => {
+        const schema = buildSchemaFromUI();
+        if (!schema) return;
+        if (schema.requested_format === 'excel' || schema.requested_format === 'sqlite') { alert("Format Excel/SQLite tidak mendukung streaming. Gunakan Generate Data!"); return; }
+        const form = document.createElement('form');
+        form.method = 'POST';
+        form.action = '/generate-stream';
+        const schemaField = document.createElement('input');
+        schemaField.type = 'hidden';
+        schemaField.name = 'schema';
+        schemaField.value = JSON.stringify(schema);
+        form.appendChild(schemaField);
+        document.body.appendChild(form);
+        form.submit();
+        form.remove();
+    });
+
+    generateBtn.addEventListener('click', async () => {
+        const schema = buildSchemaFromUI();
+        if (!schema) return;
+        const selectedOutputFormat = schema.requested_format;
 
         downloadLinksContainer.innerHTML = `<p>Memproses data (format: ${selectedOutputFormat.toUpperCase()})... Ini mungkin memakan waktu jika menggunakan Teks via AI.</p>`;
         generateBtn.disabled = true;
 
         try {
-            const response = await fetch('/generate-data', {
+            // Generasi dijalankan sebagai job di server; status & progres diambil secara berkala
+            const response = await fetch('/jobs', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify(schema),
@@ -148,34 +187,9 @@ document.addEventListener('DOMContentLoaded', () => {
 
             if (!response.ok) { const errorData = await response.json(); throw new Error(errorData.error || `HTTP error! status: ${response.status}`);}
 
-            const result = await response.json();
-            downloadLinksContainer.innerHTML = ''; 
-
-            // BARU: Logika untuk menampilkan link download berdasarkan format yang dipilih
-            if (result.download_info) {
-                if (result.download_info.is_zip) {
-                    // Handle ZIP file
-                    const link = document.createElement('a');
-                    link.href = result.download_info.url;
-                    link.textContent = `Unduh Semua Tabel (${result.download_info.format.toUpperCase()}) - ZIP`;
-                    link.download = result.download_info.filename; // Nama file dari backend
-                    downloadLinksContainer.appendChild(link);
-                } else if (result.download_info.files && result.download_info.files.length > 0) {
-                    // Handle individual files
-                    result.download_info.files.forEach(file => {
-                        const link = document.createElement('a');
-                        link.href = file.url;
-                        link.textContent = `Unduh ${file.table_name}.${file.format}`;
-                        link.download = file.filename; // Nama file dari backend
-                        downloadLinksContainer.appendChild(link);
-                        downloadLinksContainer.appendChild(document.createElement('br'));
-                    });
-                } else {
-                     downloadLinksContainer.innerHTML = '<p>Tidak ada file yang dihasilkan atau respons tidak dikenal.</p>';
-                }
-            } else {
-                downloadLinksContainer.innerHTML = '<p>Tidak ada informasi download yang diterima dari server.</p>';
-            }
+            const job = await response.json();
+            const result = await pollGenerationJob(job);
+            renderDownloadInfo(result);
 
         } catch (error) {
             console.error('Error generating data:', error);
@@ -185,6 +199,67 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
+    async function pollGenerationJob(job) {
+        downloadLinksContainer.innerHTML = '';
+        const progressText = document.createElement('p');
+        progressText.textContent = 'Job queued...';
+        const cancelBtn = document.createElement('button');
+        cancelBtn.type = 'button';
+        cancelBtn.textContent = 'Cancel';
+        cancelBtn.addEventListener('click', async () => {
+            cancelBtn.disabled = true;
+            await fetch(job.cancel_url, { method: 'POST' });
+        });
+        downloadLinksContainer.appendChild(progressText);
+        downloadLinksContainer.appendChild(cancelBtn);
+
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const response = await fetch(job.status_url);
+            if (!response.ok) { const errorData = await response.json(); throw new Error(errorData.error || `HTTP error! status: ${response.status}`);}
+            const status = await response.json();
+            const progress = status.progress;
+            if (progress) {
+                const percent = progress.rows_total ? Math.floor(100 * progress.rows_done / progress.rows_total) : 0;
+                const eta = progress.eta_seconds !== null ? `, ETA ${Math.ceil(progress.eta_seconds)} s` : '';
+                progressText.textContent = `Generating: ${progress.rows_done}/${progress.rows_total} rows (${percent}%, ${Math.round(progress.rows_per_second)} rows/s${eta})`;
+            }
+            if (status.status === 'completed') return status.result;
+            if (status.status === 'cancelled') throw new Error('Job dibatalkan.');
+            if (status.status === 'failed') throw new Error(status.error || 'Job gagal.');
+        }
+    }
+
+    function renderDownloadInfo(result) {
+        downloadLinksContainer.innerHTML = ''; 
+
+        // BARU: Logika untuk menampilkan link download berdasarkan format yang dipilih
+        if (result.download_info) {
+            if (result.download_info.is_zip) {
+                // Handle ZIP file
+                const link = document.createElement('a');
+                link.href = result.download_info.url;
+                link.textContent = `Unduh Semua Tabel (${result.download_info.format.toUpperCase()}) - ZIP`;
+                link.download = result.download_info.filename; // Nama file dari backend
+                downloadLinksContainer.appendChild(link);
+            } else if (result.download_info.files && result.download_info.files.length > 0) {
+                // Handle individual files
+                result.download_info.files.forEach(file => {
+                    const link = document.createElement('a');
+                    link.href = file.url;
+                    link.textContent = `Unduh ${file.table_name}.${file.filename.split('.').slice(1).join('.')}`;
+                    link.download = file.filename; // Nama file dari backend
+                    downloadLinksContainer.appendChild(link);
+                    downloadLinksContainer.appendChild(document.createElement('br'));
+                });
+            } else {
+                 downloadLinksContainer.innerHTML = '<p>Tidak ada file yang dihasilkan atau respons tidak dikenal.</p>';
+            }
+        } else {
+            downloadLinksContainer.innerHTML = '<p>Tidak ada informasi download yang diterima dari server.</p>';
+        }
+    }
+
     if (tablesContainer.children.length === 0) {
         addTableBtn.click();
     }
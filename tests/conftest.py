@@ -0,0 +1,62 @@
+# Lingkungan uji: direktori output/cache sementara, cache AI nonaktif, tanpa API Gemini sungguhan,
+# dan ambang shard kecil agar tabel beberapa ribu baris sudah dipecah ke beberapa proses.
+# Harus diset sebelum app diimpor (konfigurasi dibaca saat import).
+import os
+import sys
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix='dbgenie-test-')
+os.environ.update(
+    OUTPUT_DIR=os.path.join(_workdir, 'output'),
+    CACHE_DIR=os.path.join(_workdir, 'cache'),
+    AI_CACHE_MAX_ENTRIES='0',
+    OUTPUT_CLEANUP_INTERVAL='86400',
+    GEMINI_API_KEY='',
+    FAKER_POOLS='off',
+    GENERATION_PROCESSES='1',
+    PARALLEL_MIN_ROWS='1000',
+    DETERMINISTIC_BLOCK_ROWS='1000',
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import re
+
+import pytest
+
+import app as dbgenie
+
+class FakeAIResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeAIModel:
+    # Pengganti GenerativeModel.generate_content: saran deterministik, sengaja hanya sedikit nilai berbeda
+    def __init__(self, distinct=5):
+        self.distinct = distinct
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None):
+        self.calls += 1
+        match = re.search(r"Berikan (\d+)", prompt)
+        count = int(match.group(1)) if match else 20
+        # distinct=0: model tidak memberi saran sama sekali
+        return FakeAIResponse(json.dumps([f"saran {i % self.distinct}" for i in range(count)] if self.distinct else []))
+
+@pytest.fixture
+def fake_model():
+    return FakeAIModel()
+
+@pytest.fixture
+def app_module(monkeypatch, fake_model):
+    monkeypatch.setattr(dbgenie, 'gemini_model_instance', fake_model)
+    # Setiap permintaan ber-seed harus benar-benar digenerate ulang, bukan memakai artefak identik sebelumnya
+    monkeypatch.setattr(dbgenie.output_store, 'find', lambda content_key: None)
+    yield dbgenie
+    if dbgenie._generation_pool is not None:
+        dbgenie._generation_pool.shutdown()
+        dbgenie._generation_pool = None
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
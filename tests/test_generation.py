@@ -0,0 +1,158 @@
+import hashlib
+import io
+import os
+import re
+import sqlite3
+import zipfile
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+SEEDED_FORMATS = ('csv', 'csv_gzip', 'csv_zstd', 'parquet', 'arrow')
+ROUND_TRIP_FORMATS = ('csv', 'csv_gzip', 'csv_zstd', 'excel', 'parquet', 'arrow', 'sqlite')
+ROWS = 4500 # > 2 x PARALLEL_MIN_ROWS (conftest): dipecah menjadi beberapa shard saat GENERATION_PROCESSES > 1
+
+def unique_schema(requested_format, rows=ROWS, seed=None):
+    schema = {"num_rows": rows, "requested_format": requested_format, "database_context": "uji", "tables": [{"name": "Akun", "columns": [
+        {"name": "id", "type": "integer", "options": "min=1,max=1000000000", "unique": True},
+        {"name": "kode", "type": "string", "options": "min_len=6,max_len=6", "unique": True},
+        {"name": "saldo", "type": "float", "options": "min=0,max=100000,precision=2", "unique": True},
+        {"name": "tgl", "type": "date", "options": "start=1900-01-01,end=2020-12-31", "unique": True},
+        {"name": "token", "type": "uuid", "unique": True},
+        {"name": "email", "type": "email"}, # Faker unik berbasis himpunan tidak bisa di-shard, jadi dibiarkan non-unik
+        {"name": "julukan", "type": "ai_text", "unique": True},
+        {"name": "catatan", "type": "ai_text", "nullable": True, "nullable_chance": 10},
+    ]}]}
+    # Tanpa seed potongan mengikuti chunk_size; dibuat kecil agar tabel uji tetap dipecah ke beberapa shard
+    if seed is not None: schema["seed"] = seed
+    else: schema["chunk_size"] = 500
+    return schema
+
+def relational_schema(requested_format, seed=None):
+    schema = {"num_rows": 3000, "requested_format": requested_format, "tables": [
+        {"name": "Pesanan", "columns": [
+            {"name": "id", "type": "uuid", "unique": True},
+            {"name": "pelanggan_id", "type": "foreign_key", "options": "ref=Pelanggan.id,min_children=2,max_children=5"},
+            {"name": "produk_kode", "type": "foreign_key", "options": "ref=Produk.kode,skew=1.2"},
+        ]},
+        {"name": "Pelanggan", "num_rows": 1000, "columns": [
+            {"name": "id", "type": "integer", "options": "min=1,max=100000000", "unique": True},
+            {"name": "nama", "type": "fullname"},
+        ]},
+        {"name": "Produk", "num_rows": 50, "columns": [
+            {"name": "kode", "type": "custom_list", "options": ",".join(f"P{i:03d}" for i in range(80)), "unique": True},
+        ]},
+    ]}
+    if seed is not None: schema["seed"] = seed
+    return schema
+
+def generate(client, app_module, schema):
+    # Jalankan /generate-data dan kembalikan {nama tabel: (nama file, bytes)}; arsip zip dibuka per entri
+    response = client.post('/generate-data', json=schema)
+    assert response.status_code == 200, response.get_json()
+    download_info = response.get_json()['download_info']
+    with open(os.path.join(app_module.OUTPUT_DIR, download_info['filename'] if download_info['is_zip'] else download_info['files'][0]['filename']), 'rb') as f:
+        data = f.read()
+    if not download_info['is_zip']:
+        return {download_info['files'][0]['table_name']: (download_info['files'][0]['filename'], data)}
+    with zipfile.ZipFile(io.BytesIO(data)) as zipf:
+        # Nama entri: <tabel>.<ekstensi> (mode seed) atau <tabel>_<timestamp>.<ekstensi>
+        return {re.sub(r"(_\d{20})?\..*$", "", name): (name, zipf.read(name)) for name in zipf.namelist()}
+
+def read_table(filename, data):
+    if filename.endswith('.csv'): return pd.read_csv(io.BytesIO(data), keep_default_na=False, na_values=[''])
+    if filename.endswith('.csv.gz'): return pd.read_csv(io.BytesIO(data), compression='gzip', keep_default_na=False, na_values=[''])
+    if filename.endswith('.csv.zst'):
+        with pa.input_stream(pa.BufferReader(data), compression='zstd') as stream:
+            return pd.read_csv(io.BytesIO(stream.read()), keep_default_na=False, na_values=[''])
+    if filename.endswith('.xlsx'): return pd.read_excel(io.BytesIO(data))
+    if filename.endswith('.parquet'): return pd.read_parquet(io.BytesIO(data))
+    if filename.endswith('.arrow'): return pa.ipc.open_file(pa.BufferReader(data)).read_pandas()
+    raise AssertionError(f"format tidak dikenal: {filename}")
+
+def read_tables(outputs, tmp_path):
+    tables = {}
+    for table_name, (filename, data) in outputs.items():
+        if filename.endswith('.sqlite'):
+            path = tmp_path / filename
+            path.write_bytes(data)
+            with sqlite3.connect(path) as conn:
+                names = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+                for name in names: tables[name] = pd.read_sql_query(f'SELECT * FROM "{name}"', conn)
+        else:
+            tables[table_name] = read_table(filename, data)
+    return tables
+
+def use_processes(monkeypatch, app_module, processes):
+    # Set GENERATION_PROCESSES & catat jumlah shard per tabel agar uji bisa memastikan tabel benar-benar dipecah
+    monkeypatch.setattr(app_module, 'GENERATION_PROCESSES', processes)
+    shard_counts = {}
+    build_shard_tasks = app_module.build_shard_tasks
+    def counting_build_shard_tasks(table_name, *args, **kwargs):
+        tasks = build_shard_tasks(table_name, *args, **kwargs)
+        shard_counts[table_name] = len(tasks)
+        return tasks
+    monkeypatch.setattr(app_module, 'build_shard_tasks', counting_build_shard_tasks)
+    return shard_counts
+
+def digests(outputs):
+    return {table_name: hashlib.sha256(data).hexdigest() for table_name, (_, data) in outputs.items()}
+
+@pytest.mark.parametrize('requested_format', SEEDED_FORMATS)
+def test_seeded_output_identical_across_process_counts(client, app_module, monkeypatch, requested_format):
+    single = digests(generate(client, app_module, unique_schema(requested_format, seed=42)))
+    shard_counts = use_processes(monkeypatch, app_module, 3)
+    sharded = digests(generate(client, app_module, unique_schema(requested_format, seed=42)))
+    assert shard_counts['Akun'] > 1
+    assert single == sharded
+    assert digests(generate(client, app_module, unique_schema(requested_format, seed=43))) != single
+
+@pytest.mark.parametrize('requested_format', SEEDED_FORMATS)
+def test_seeded_stream_matches_file(client, app_module, requested_format):
+    outputs = generate(client, app_module, unique_schema(requested_format, seed=7))
+    response = client.post('/generate-stream', json=unique_schema(requested_format, seed=7))
+    assert response.status_code == 200
+    assert response.get_data() == outputs['Akun'][1]
+
+def test_negative_seed_differs_from_positive(client, app_module):
+    positive = digests(generate(client, app_module, unique_schema('csv', rows=50, seed=1)))
+    assert digests(generate(client, app_module, unique_schema('csv', rows=50, seed=-1))) != positive
+
+@pytest.mark.parametrize('processes', (1, 3))
+@pytest.mark.parametrize('requested_format', ROUND_TRIP_FORMATS)
+def test_unique_columns_round_trip(client, app_module, monkeypatch, tmp_path, requested_format, processes):
+    shard_counts = use_processes(monkeypatch, app_module, processes)
+    table = read_tables(generate(client, app_module, unique_schema(requested_format)), tmp_path)['Akun']
+    if processes > 1 and requested_format not in ('excel', 'sqlite'): assert shard_counts['Akun'] > 1
+    assert len(table) == ROWS
+    for column in ('id', 'kode', 'saldo', 'tgl', 'token', 'julukan'):
+        assert table[column].notna().all(), column
+        assert table[column].nunique() == ROWS, column
+    # Kolom ai_text non-unik hanya berisi saran dari model palsu (atau null)
+    assert set(table['catatan'].dropna()) <= {f"saran {i}" for i in range(5)}
+
+@pytest.mark.parametrize('processes', (1, 3))
+@pytest.mark.parametrize('requested_format', ('csv', 'parquet', 'sqlite'))
+def test_foreign_keys_reference_parent_keys(client, app_module, monkeypatch, tmp_path, requested_format, processes):
+    shard_counts = use_processes(monkeypatch, app_module, processes)
+    tables = read_tables(generate(client, app_module, relational_schema(requested_format, seed=5)), tmp_path)
+    if processes > 1 and requested_format != 'sqlite': assert shard_counts['Pesanan'] > 1
+    orders, customers, products = tables['Pesanan'], tables['Pelanggan'], tables['Produk']
+    assert len(orders) == 3000 and len(customers) == 1000 and len(products) == 50
+    assert set(orders['pelanggan_id']) <= set(customers['id'])
+    assert set(orders['produk_kode']) <= set(products['kode'])
+    children = orders['pelanggan_id'].value_counts().reindex(customers['id'], fill_value=0)
+    assert children.min() >= 2 and children.max() <= 5
+
+def test_ai_prefetch_uses_fake_model(client, app_module, fake_model, tmp_path):
+    table = read_tables(generate(client, app_module, unique_schema('csv', rows=30)), tmp_path)['Akun']
+    assert fake_model.calls == 2 # satu permintaan per kolom ai_text
+    assert table['julukan'].nunique() == 30
+
+def test_unique_ai_text_without_suggestions_is_ai_failure(client, app_module, fake_model):
+    fake_model.distinct = 0
+    before = set(os.listdir(app_module.OUTPUT_DIR))
+    response = client.post('/generate-data', json=unique_schema('csv', rows=20))
+    assert response.status_code == 502
+    assert set(os.listdir(app_module.OUTPUT_DIR)) == before